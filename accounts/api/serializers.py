@@ -14,7 +14,7 @@ class RegisterSerializer(serializers.Serializer):
         if attrs["password"] != attrs["confirmed_password"]:
             raise serializers.ValidationError(
                 "Please check your input and try again.")
-        if User.objects.filter(email__iexact=attrs["email"]).exists():
+        if User.objects.filter_by_email(attrs["email"]).exists():
             raise serializers.ValidationError(
                 "Please check your input and try again.")
         return attrs
@@ -36,14 +36,9 @@ class LoginSerializer(serializers.Serializer):
     password = serializers.CharField(write_only=True)
 
     def validate(self, attrs):
-        email = attrs["email"].lower().strip()
-        try:
-            user = User.objects.get(email__iexact=email)
-        except User.DoesNotExist:
-            raise serializers.ValidationError(
-                "Please check your input and try again.")
-
-        user = authenticate(username=user.username, password=attrs["password"])
+        user = authenticate(
+            self.context.get("request"), email=attrs["email"], password=attrs["password"]
+        )
         if not user or not user.is_active:
             raise serializers.ValidationError(
                 "Please check your input and try again.")
@@ -6,8 +6,9 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.exceptions import TokenError
-from rest_framework_simplejwt.tokens import RefreshToken
 
+from accounts.throttling import AccountSlidingWindowThrottle, IPSlidingWindowThrottle
+from accounts.tokens import CachedBlacklistRefreshToken
 from accounts.models import User
 from accounts.api.serializers import LoginSerializer, RegisterSerializer
 from accounts.utils import (
@@ -27,6 +28,8 @@ from accounts.utils import (
 class RegisterView(APIView):
     """Handle user registration and send account activation email."""
     permission_classes = [AllowAny]
+    throttle_classes = [IPSlidingWindowThrottle, AccountSlidingWindowThrottle]
+    throttle_scope = "register"
 
     def post(self, request):
         """Create a new inactive user and send an activation link via email."""
@@ -91,10 +94,12 @@ class ActivateView(APIView):
 class LoginView(APIView):
     """Authenticate user and issue JWT tokens as HttpOnly cookies."""
     permission_classes = [AllowAny]
+    throttle_classes = [IPSlidingWindowThrottle, AccountSlidingWindowThrottle]
+    throttle_scope = "login"
 
     def post(self, request):
         """Validate credentials and set access and refresh tokens in cookies."""
-        serializer = LoginSerializer(data=request.data)
+        serializer = LoginSerializer(data=request.data, context={"request": request})
         if not serializer.is_valid():
             return Response({"detail": "Please check your input and try again."}, status=401)
 
@@ -132,7 +137,7 @@ class LogoutView(APIView):
     def _blacklist_refresh(self, raw_refresh: str) -> bool:
         """Blacklist refresh token. Returns True on success."""
         try:
-            token = RefreshToken(raw_refresh)
+            token = CachedBlacklistRefreshToken(raw_refresh)
             token.blacklist()
             return True
         except TokenError:
@@ -142,6 +147,8 @@ class LogoutView(APIView):
 class TokenRefreshView(APIView):
     """Refresh expired access token using valid refresh token."""
     permission_classes = [AllowAny]
+    throttle_classes = [IPSlidingWindowThrottle]
+    throttle_scope = "token_refresh"
 
     def post(self, request):
         """Generate a new access token and update HttpOnly cookie."""
@@ -158,9 +165,9 @@ class TokenRefreshView(APIView):
         return response
 
     def _create_access_token(self, raw_refresh: str) -> str | None:
-        """Return a new access token string or None."""
+        """Return a new access token string or None (revoked tokens are rejected via Redis)."""
         try:
-            refresh = RefreshToken(raw_refresh)
+            refresh = CachedBlacklistRefreshToken(raw_refresh)
             return str(refresh.access_token)
         except TokenError:
             return None
@@ -169,6 +176,8 @@ class TokenRefreshView(APIView):
 class PasswordResetView(APIView):
     """Send password reset email to user if account exists."""
     permission_classes = [AllowAny]
+    throttle_classes = [IPSlidingWindowThrottle, AccountSlidingWindowThrottle]
+    throttle_scope = "password_reset"
 
     def post(self, request):
         """Validate token and set new password for the user."""
@@ -191,7 +200,7 @@ class PasswordResetView(APIView):
         """Return active user by email or None."""
         if not email:
             return None
-        return User.objects.filter(email__iexact=email, is_active=True).first()
+        return User.objects.filter_by_email(email).filter(is_active=True).first()
 
     def _send_reset(self, user) -> None:
         """Send password reset email for a user."""
@@ -0,0 +1,24 @@
+from django.contrib.auth.backends import ModelBackend
+
+from .models import User
+
+
+class EmailBackend(ModelBackend):
+    """
+    Authenticate with email and password in a single query.
+    The user is looked up case-insensitively via the lower(email) index.
+    """
+
+    def authenticate(self, request, email=None, password=None, **kwargs):
+        if email is None or password is None:
+            return None
+
+        user = User.objects.filter_by_email(email).first()
+        if user is None:
+            # Hash anyway, so unknown emails take as long as wrong passwords.
+            User().set_password(password)
+            return None
+
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
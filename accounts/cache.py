@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+_local_users: OrderedDict = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def _user_key(user_id) -> str:
+    """Return the Redis cache key of a resolved user."""
+    return f"accounts:user:{user_id}"
+
+
+def _local_max_size() -> int:
+    """Return how many users the in-process LRU keeps."""
+    return int(getattr(settings, "USER_CACHE_LOCAL_SIZE", 1024))
+
+
+def _local_ttl() -> int:
+    """Return how long an in-process entry may be used without asking Redis."""
+    return int(getattr(settings, "USER_CACHE_LOCAL_TTL", 30))
+
+
+def _cached_fields() -> list[str]:
+    """Return the user columns kept in the cache: every concrete field except the password hash."""
+    return [field.attname for field in get_user_model()._meta.concrete_fields if field.attname != "password"]
+
+
+def _dump_user(user) -> dict:
+    """
+    Return the cached form of a user. Instead of the password hash only its
+    simplejwt revoke marker is stored, which is all token checks need.
+    """
+    data = {name: getattr(user, name) for name in _cached_fields()}
+    data["password_marker"] = get_md5_hash_password(user.password)
+    return data
+
+
+def _load_user(data: dict):
+    """
+    Rebuild a user from its cached form. The password is left deferred, so it is
+    read from the database only if accessed, and save() never writes a stale hash.
+    """
+    fields = _cached_fields()
+    user = get_user_model().from_db(DEFAULT_DB_ALIAS, fields, [data[name] for name in fields])
+    user.password_marker = data["password_marker"]
+    return user
+
+
+def get_cached_user(user_id):
+    """
+    Return a cached user for the id, or None on a miss.
+    The in-process LRU is checked first, then the shared Redis cache.
+    Every call returns a new instance, so callers never share one object.
+    """
+    user_id = str(user_id)
+    now = time.monotonic()
+    with _local_lock:
+        entry = _local_users.get(user_id)
+        if entry and entry[0] > now:
+            _local_users.move_to_end(user_id)
+            return _load_user(entry[1])
+        _local_users.pop(user_id, None)
+
+    data = cache.get(_user_key(user_id))
+    if not isinstance(data, dict):
+        # Miss, or a full User pickled by an older release: reload from the database.
+        return None
+    _remember_locally(user_id, data, _local_ttl())
+    return _load_user(data)
+
+
+def cache_user(user, timeout: int) -> None:
+    """Cache a resolved user for at most `timeout` seconds (the token's remaining lifetime)."""
+    if timeout <= 0:
+        return
+    data = _dump_user(user)
+    cache.set(_user_key(user.pk), data, timeout)
+    _remember_locally(str(user.pk), data, min(timeout, _local_ttl()))
+
+
+def invalidate_cached_user(user_id) -> None:
+    """
+    Drop a cached user (called by the User post_save/post_delete signal).
+    Other processes' LRU entries expire after USER_CACHE_LOCAL_TTL seconds.
+    """
+    cache.delete(_user_key(user_id))
+    with _local_lock:
+        _local_users.pop(str(user_id), None)
+
+
+def _remember_locally(user_id, data: dict, ttl: int) -> None:
+    """Store a cached user in the in-process LRU, evicting the least recently used entry."""
+    with _local_lock:
+        _local_users[user_id] = (time.monotonic() + ttl, data)
+        _local_users.move_to_end(user_id)
+        while len(_local_users) > _local_max_size():
+            _local_users.popitem(last=False)
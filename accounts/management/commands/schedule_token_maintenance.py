@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from accounts.tasks import schedule_token_maintenance, sync_blacklist_cache
+
+
+class Command(BaseCommand):
+    """Bootstrap the self-rescheduling token maintenance job (run on container start)."""
+
+    help = "Sync the Redis JWT blacklist and schedule the next token maintenance run."
+
+    def handle(self, *args, **options):
+        count = sync_blacklist_cache()
+        job_id = schedule_token_maintenance()
+        self.stdout.write(f"Synced {count} blacklisted tokens; next maintenance job: {job_id}")
@@ -1,10 +1,26 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as DjangoUserManager
 from django.db import models
+from django.db.models.functions import Lower
+
+
+class UserManager(DjangoUserManager):
+    """User manager with case-insensitive email lookups backed by the lower(email) index."""
+
+    def filter_by_email(self, email: str):
+        """Return users whose email matches case-insensitively (uses user_email_lower_idx)."""
+        return self.alias(email_lower=Lower("email")).filter(email_lower=email.strip().lower())
 
 
 class User(AbstractUser):
     """Custom user model with unique email."""
     email = models.EmailField(unique=True)
 
+    objects = UserManager()
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(Lower("email"), name="user_email_lower_idx"),
+        ]
+
     def __str__(self) -> str:
         return self.email or self.username
@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .cache import invalidate_cached_user
+from .models import User
+from .tokens import remember_blacklisted
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def blacklisted_token_post_save(sender, instance: BlacklistedToken, created: bool, **kwargs):
+    """
+    Mirror every blacklisted JTI (logout, admin) into Redis after commit,
+    so refresh requests can reject it without a database query.
+    """
+    if not created:
+        return
+
+    jti = instance.token.jti
+    exp = int(instance.token.expires_at.timestamp())
+    transaction.on_commit(lambda: remember_blacklisted(jti, exp))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance: User, **kwargs):
+    """
+    Drop the cached copy of a user on every save or delete (activation, password
+    change, is_active/is_staff edits in the admin), so CookieJWTAuthentication
+    reloads it. Dropped now and again after commit, so a request racing the
+    transaction cannot keep the old row cached.
+    """
+    user_id = instance.pk
+    invalidate_cached_user(user_id)
+    transaction.on_commit(lambda: invalidate_cached_user(user_id))
@@ -0,0 +1,242 @@
+from __future__ import annotations
+import json
+import logging
+import smtplib
+from datetime import datetime
+import django_rq
+from croniter import croniter
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rq import Retry
+from rq import get_current_job
+from rq.job import Job
+from .tokens import BLACKLIST_SYNCED_KEY, remember_blacklisted
+
+
+logger = logging.getLogger(__name__)
+
+MAIL_QUEUE = "mail"
+MAIL_OUTBOX_KEY = "accounts:mail:outbox"
+MAIL_DEAD_LETTER_KEY = "accounts:mail:dead-letter"
+MAIL_FLUSH_LOCK_KEY = "accounts:mail:flush-lock"
+MAIL_RESCHEDULE_JOB_PREFIX = "mail-flush"
+
+# Backoff in seconds between attempts when the mail relay is unavailable.
+MAIL_RETRY_INTERVALS = [10, 60, 300]
+
+# A message that keeps failing is moved to the dead-letter list after this many attempts,
+# i.e. within the retries of one flush job.
+MAIL_MAX_ATTEMPTS = len(MAIL_RETRY_INTERVALS) + 1
+
+# Emails sent per flush job; the rest is left to a follow-up job, so a job stays well
+# inside the mail queue's timeout. The lock is renewed after every email.
+MAIL_FLUSH_BATCH_SIZE = 50
+MAIL_FLUSH_LOCK_TIMEOUT = 60
+
+
+def _outbox():
+    """Return the Redis connection holding the outbox (the one of the mail queue)."""
+    return django_rq.get_connection(MAIL_QUEUE)
+
+
+def _flush_retry() -> Retry:
+    return Retry(max=len(MAIL_RETRY_INTERVALS), interval=MAIL_RETRY_INTERVALS)
+
+
+def _enqueue_flush() -> None:
+    django_rq.get_queue(MAIL_QUEUE).enqueue(flush_email_outbox, retry=_flush_retry())
+
+
+def _reschedule_flush() -> str:
+    """
+    Schedule a fresh flush job (with its own retries) MAIL_RETRY_INTERVALS[-1] seconds
+    from now, rounded up to that interval. The job id is derived from the run time,
+    so all failing jobs of an outage share one follow-up instead of piling up.
+    """
+    interval = MAIL_RETRY_INTERVALS[-1]
+    now = timezone.now()
+    run_at = datetime.fromtimestamp((int(now.timestamp()) // interval + 2) * interval, tz=now.tzinfo)
+    job_id = f"{MAIL_RESCHEDULE_JOB_PREFIX}-{run_at:%Y%m%d%H%M}"
+
+    queue = django_rq.get_queue(MAIL_QUEUE)
+    if queue.fetch_job(job_id) is None:
+        queue.enqueue_at(run_at, flush_email_outbox, job_id=job_id, retry=_flush_retry())
+    return job_id
+
+
+def queue_email(subject: str, html_message: str, to_email: str) -> None:
+    """
+    Put an HTML email into the Redis outbox and enqueue a flush job.
+    Returns immediately; no SMTP work happens in the request.
+    """
+    payload = json.dumps({"subject": subject, "html_message": html_message, "to": [to_email]})
+    _outbox().rpush(MAIL_OUTBOX_KEY, payload)
+    _enqueue_flush()
+
+
+def _build_message(payload: dict, connection) -> EmailMultiAlternatives:
+    """Rebuild the queued email exactly as send_mail(message="", html_message=...) would."""
+    message = EmailMultiAlternatives(
+        subject=payload["subject"],
+        body="",
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=payload["to"],
+        connection=connection,
+    )
+    message.attach_alternative(payload["html_message"], "text/html")
+    return message
+
+
+def _failure_kind(exc: Exception) -> str:
+    """
+    Classify a send error:
+    - "connection": the relay is unreachable or dropped the connection; nothing is wrong with the email
+    - "permanent": the relay rejected the email with a 5xx reply
+    - "temporary": a 4xx reply or any other error, retried up to MAIL_MAX_ATTEMPTS times
+    """
+    if isinstance(exc, smtplib.SMTPServerDisconnected) or (
+        isinstance(exc, OSError) and not isinstance(exc, smtplib.SMTPException)
+    ):
+        return "connection"
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in exc.recipients.values()]
+        return "permanent" if codes and all(code >= 500 for code in codes) else "temporary"
+    if isinstance(exc, smtplib.SMTPResponseException) and exc.smtp_code >= 500:
+        return "permanent"
+    return "temporary"
+
+
+def _dead_letter(outbox, payload: dict, exc: Exception) -> None:
+    """Move the head of the outbox to the dead-letter list in one transaction."""
+    logger.error("Moving email to %s to the dead-letter list: %r", payload["to"], exc)
+    payload["error"] = repr(exc)
+    with outbox.pipeline() as pipe:
+        pipe.rpush(MAIL_DEAD_LETTER_KEY, json.dumps(payload))
+        pipe.lpop(MAIL_OUTBOX_KEY)
+        pipe.execute()
+
+
+def flush_email_outbox() -> int:
+    """
+    Send up to MAIL_FLUSH_BATCH_SIZE queued emails over a single SMTP connection and
+    return the number sent.
+
+    - A Redis lock serializes flush jobs, so no email is sent twice; a job
+      waiting for the lock drains whatever was queued meanwhile.
+    - An email is only removed from the outbox after it was sent. Connection
+      errors abort the job and RQ retries it with backoff (MAIL_RETRY_INTERVALS).
+      When the last retry fails too, a new flush job is scheduled, so a long relay
+      outage delays the outbox but never strands it.
+    - Emails the relay rejects for good (5xx), or that fail MAIL_MAX_ATTEMPTS times,
+      are moved to the dead-letter list, so one bad email never blocks the outbox.
+    """
+    try:
+        return _flush_outbox()
+    except Exception:
+        job = get_current_job()
+        if job is None or not job.retries_left:
+            _reschedule_flush()
+        raise
+
+
+def _flush_outbox() -> int:
+    outbox = _outbox()
+    sent = 0
+    with outbox.lock(
+        MAIL_FLUSH_LOCK_KEY, timeout=MAIL_FLUSH_LOCK_TIMEOUT, blocking_timeout=MAIL_FLUSH_LOCK_TIMEOUT
+    ) as lock:
+        if not outbox.llen(MAIL_OUTBOX_KEY):
+            return sent
+
+        with get_connection(fail_silently=False) as connection:
+            for _ in range(MAIL_FLUSH_BATCH_SIZE):
+                raw = outbox.lindex(MAIL_OUTBOX_KEY, 0)
+                if raw is None:
+                    break
+                payload = json.loads(raw)
+                try:
+                    _build_message(payload, connection).send()
+                except Exception as exc:
+                    kind = _failure_kind(exc)
+                    if kind == "connection":
+                        raise
+                    payload["attempts"] = payload.get("attempts", 0) + 1
+                    if kind == "temporary" and payload["attempts"] < MAIL_MAX_ATTEMPTS:
+                        outbox.lset(MAIL_OUTBOX_KEY, 0, json.dumps(payload))
+                        raise
+                    _dead_letter(outbox, payload, exc)
+                else:
+                    outbox.lpop(MAIL_OUTBOX_KEY)
+                    sent += 1
+                lock.reacquire()
+
+        if outbox.llen(MAIL_OUTBOX_KEY):
+            _enqueue_flush()
+    return sent
+
+
+TOKEN_MAINTENANCE_JOB_PREFIX = "token-maintenance"
+
+
+def prune_expired_tokens(batch_size: int | None = None) -> int:
+    """
+    Delete expired outstanding tokens and their blacklist entries in batches
+    of TOKEN_PRUNE_BATCH_SIZE rows, so no single statement locks the tables for long.
+    Returns the number of outstanding tokens deleted.
+    """
+    batch_size = batch_size or getattr(settings, "TOKEN_PRUNE_BATCH_SIZE", 5000)
+    now = timezone.now()
+    deleted = 0
+    while True:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lte=now).values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        BlacklistedToken.objects.filter(token_id__in=ids).delete()
+        OutstandingToken.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+
+
+def sync_blacklist_cache() -> int:
+    """
+    Copy every unexpired blacklisted JTI into Redis and mark the blacklist as synced,
+    which lets CachedBlacklistRefreshToken skip the database. Returns the number of JTIs.
+    """
+    rows = BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now()).values_list(
+        "token__jti", "token__expires_at"
+    )
+    count = 0
+    for jti, expires_at in rows.iterator():
+        remember_blacklisted(jti, int(expires_at.timestamp()))
+        count += 1
+    cache.set(BLACKLIST_SYNCED_KEY, 1, None)
+    return count
+
+
+def schedule_token_maintenance() -> str:
+    """
+    Schedule the next token maintenance run at the next TOKEN_MAINTENANCE_CRON time.
+    The job id is derived from the run time, so repeated calls schedule it only once.
+    Needs a worker started with --with-scheduler.
+    """
+    cron = getattr(settings, "TOKEN_MAINTENANCE_CRON", "0 3 * * *")
+    run_at = croniter(cron, timezone.now()).get_next(datetime)
+    job_id = f"{TOKEN_MAINTENANCE_JOB_PREFIX}-{run_at:%Y%m%d%H%M}"
+
+    queue = django_rq.get_queue("default")
+    if not Job.exists(job_id, connection=queue.connection):
+        queue.enqueue_at(run_at, run_token_maintenance, job_id=job_id)
+    return job_id
+
+
+def run_token_maintenance() -> None:
+    """Prune the token tables, refresh the Redis blacklist and schedule the next run."""
+    try:
+        prune_expired_tokens()
+        sync_blacklist_cache()
+    finally:
+        schedule_token_maintenance()
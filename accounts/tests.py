@@ -1,3 +1,78 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from accounts.cache import cache_user, get_cached_user
+from accounts.models import User
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class IPThrottleTests(TestCase):
+    """The per-IP limit must not be reset by client-supplied X-Forwarded-For headers."""
+
+    def setUp(self):
+        cache.clear()
+
+    def _refresh(self, index):
+        return self.client.post("/api/token/refresh/", HTTP_X_FORWARDED_FOR=f"203.0.113.{index % 250}")
+
+    def test_spoofed_forwarded_for_is_throttled(self):
+        statuses = [self._refresh(index).status_code for index in range(80)]
+
+        self.assertIn(429, statuses)
+        self.assertEqual(statuses.count(429), 20)
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class UserCacheInvalidationTests(TestCase):
+    """Any change to a user, wherever it is saved, must drop the cached copy."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="viewer@example.com", email="viewer@example.com", password="secret-pass-1", is_staff=True
+        )
+        cache_user(self.user, 300)
+
+    def test_admin_edit_drops_cached_user(self):
+        self.user.is_staff = False
+        self.user.save()
+
+        self.assertIsNone(get_cached_user(self.user.pk))
+
+    def test_password_change_drops_cached_user(self):
+        self.user.set_password("another-pass-2")
+        self.user.save(update_fields=["password"])
+
+        self.assertIsNone(get_cached_user(self.user.pk))
+
+    def test_delete_drops_cached_user(self):
+        user_id = self.user.pk
+        self.user.delete()
+
+        self.assertIsNone(get_cached_user(user_id))
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class UserCacheContentTests(TestCase):
+    """The shared cache must not hold password hashes or hand out shared instances."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="viewer@example.com", email="viewer@example.com", password="secret-pass-1"
+        )
+        cache_user(self.user, 300)
+
+    def test_password_hash_is_not_cached(self):
+        cached = cache.get(f"accounts:user:{self.user.pk}")
+
+        self.assertNotIn("password", cached)
+        self.assertNotIn(self.user.password, cached.values())
+
+    def test_every_lookup_returns_a_new_instance(self):
+        first = get_cached_user(self.user.pk)
+        second = get_cached_user(self.user.pk)
+
+        self.assertIsNot(first, second)
+        self.assertEqual(first.email, "viewer@example.com")
+        self.assertIn("password", first.get_deferred_fields())
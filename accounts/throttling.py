@@ -0,0 +1,75 @@
+from __future__ import annotations
+import hashlib
+from rest_framework.throttling import ScopedRateThrottle
+
+
+class SlidingWindowThrottle(ScopedRateThrottle):
+    """
+    Sliding-window rate limit on the django-redis cache, keyed by the view's `throttle_scope`.
+
+    Two fixed-window counters are kept per client (current and previous window). The
+    previous count is weighted by how much of it still overlaps the sliding window, so
+    a request costs one atomic INCR and one GET instead of storing a timestamp history.
+    Rejected requests are counted too, so a client that keeps hammering stays blocked.
+    Scopes without a rate in DEFAULT_THROTTLE_RATES are not throttled.
+    """
+
+    scope_suffix = ""
+
+    def allow_request(self, request, view) -> bool:
+        scope = getattr(view, self.scope_attr, None)
+        if not scope or f"{scope}{self.scope_suffix}" not in self.THROTTLE_RATES:
+            return True
+
+        self.scope = f"{scope}{self.scope_suffix}"
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        return self._hit()
+
+    def _hit(self) -> bool:
+        """Count this request and return False once the weighted count exceeds the rate."""
+        now = self.timer()
+        window = int(now // self.duration)
+        current_key = f"{self.key}:{window}"
+
+        # Counters live for two windows, so the previous one is still readable.
+        self.cache.add(current_key, 0, timeout=self.duration * 2)
+        current = self.cache.incr(current_key)
+        previous = self.cache.get(f"{self.key}:{window - 1}", 0)
+
+        elapsed = (now % self.duration) / self.duration
+        if previous * (1 - elapsed) + current <= self.num_requests:
+            return True
+
+        self._wait = self.duration - (now % self.duration)
+        return False
+
+    def wait(self) -> float | None:
+        """Seconds until the current window rolls over (sent as Retry-After)."""
+        return getattr(self, "_wait", None)
+
+
+class IPSlidingWindowThrottle(SlidingWindowThrottle):
+    """Limit requests per client IP (rate `<throttle_scope>`)."""
+
+
+class AccountSlidingWindowThrottle(SlidingWindowThrottle):
+    """
+    Limit requests per targeted account (rate `<throttle_scope>_account`), so a
+    distributed burst against one email is stopped regardless of the source IPs.
+    Requests without an email are left to the IP throttle.
+    """
+
+    scope_suffix = "_account"
+
+    def get_cache_key(self, request, view) -> str | None:
+        email = request.data.get("email") if hasattr(request.data, "get") else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+
+        ident = hashlib.sha256(email.strip().lower().encode()).hexdigest()[:32]
+        return self.cache_format % {"scope": self.scope, "ident": ident}
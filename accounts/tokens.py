@@ -0,0 +1,43 @@
+from __future__ import annotations
+import time
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+BLACKLIST_KEY_PREFIX = "accounts:blacklist:"
+
+# Set once every blacklisted, unexpired JTI has been copied to Redis (see accounts.tasks).
+BLACKLIST_SYNCED_KEY = "accounts:blacklist:synced"
+
+
+def _blacklist_key(jti: str) -> str:
+    return f"{BLACKLIST_KEY_PREFIX}{jti}"
+
+
+def remember_blacklisted(jti: str, exp: int) -> None:
+    """Mark a JTI as revoked in Redis until the token expires anyway."""
+    timeout = int(exp - time.time())
+    if timeout > 0:
+        cache.set(_blacklist_key(jti), 1, timeout)
+
+
+class CachedBlacklistRefreshToken(RefreshToken):
+    """
+    Refresh token whose blacklist check is answered by Redis.
+
+    Revoked JTIs are stored as keys that expire together with the token
+    (written by the BlacklistedToken post_save signal). Once the
+    blacklist has been synced to Redis, a missing key means "not revoked" and no
+    database query runs; before that, the check falls back to the blacklist table.
+    """
+
+    def check_blacklist(self) -> None:
+        key = _blacklist_key(self.payload[api_settings.JTI_CLAIM])
+        values = cache.get_many([key, BLACKLIST_SYNCED_KEY])
+        if values.get(key):
+            raise TokenError(_("Token is blacklisted"))
+        if not values.get(BLACKLIST_SYNCED_KEY):
+            super().check_blacklist()
@@ -6,7 +6,7 @@ from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.core.mail import send_mail
+from .tasks import queue_email
 from django.template.loader import render_to_string
 
 def create_activation_token(user) -> str:
@@ -42,38 +42,24 @@ def build_frontend_password_reset_link(uidb64: str, token: str) -> str:
 
 
 def send_activation_email(to_email: str, activation_link: str) -> None:
-    """Send activation email using Django's send_mail()."""
+    """Queue the activation email; an RQ worker sends it (see accounts.tasks)."""
     subject = "Activate your Videoflix account"
     html_message = render_to_string(
         "accounts/activation_email.html",
         {"activation_link": activation_link},
 )
 
-    send_mail(
-        subject=subject,
-        message="",
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[to_email],
-        html_message=html_message,
-        fail_silently=False,
-    )
+    queue_email(subject, html_message, to_email)
 
 def  send_password_reset_email(to_email: str, reset_link: str) -> None:
-    """Send reset_password email using Django's send_mail()."""
+    """Queue the reset_password email; an RQ worker sends it (see accounts.tasks)."""
     subject = "reset your password account"
     html_message = render_to_string(
         "accounts/password_reset.html",
         {"reset_link": reset_link},
 )
 
-    send_mail(
-        subject=subject,
-        message="",
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[to_email],
-        html_message=html_message,
-        fail_silently=False,
-    )
+    queue_email(subject, html_message, to_email)
 
 
 def make_refresh_token(user) -> RefreshToken:
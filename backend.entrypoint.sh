@@ -38,8 +38,18 @@ else:
     print(f"Superuser '{username}' already exists.")
 EOF
 
+python manage.py schedule_token_maintenance
+
+# The scheduler runs the delayed token maintenance job
+python manage.py rqworker default --with-scheduler &
 python manage.py rqworker default &
 python manage.py rqworker default &
-python manage.py rqworker default &
+# Mail worker; the scheduler runs the delayed retries of failed deliveries
+python manage.py rqworker mail --with-scheduler &
+
+# APP_SERVER=asgi: uvicorn event loop, HLS playlists/segments are streamed by the async views
+if [ "$APP_SERVER" = "asgi" ]; then
+  exec uvicorn core.asgi:application --host 0.0.0.0 --port 8000 --workers "${WEB_WORKERS:-2}"
+fi
 
 exec gunicorn core.wsgi:application --bind 0.0.0.0:8000 --reload --timeout 120
\ No newline at end of file
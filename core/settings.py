@@ -130,9 +130,51 @@ RQ_QUEUES = {
         "DB": os.environ.get("REDIS_DB", default=0),
         "DEFAULT_TIMEOUT": 900,
         "REDIS_CLIENT_KWARGS": {},
-    }
+    },
+    # Activation/password-reset emails, kept apart from long transcoding jobs
+    "mail": {
+        "HOST": os.environ.get("REDIS_HOST", default="redis"),
+        "PORT": os.environ.get("REDIS_PORT", default=6379),
+        "DB": os.environ.get("REDIS_DB", default=0),
+        "DEFAULT_TIMEOUT": 300,
+        "REDIS_CLIENT_KWARGS": {},
+    },
 }
 
+# HLS transcoding
+# - "single_pass": decode the source once and split it into every rendition
+# - "sequential": run one ffmpeg process per rendition
+# - "fan_out": enqueue one RQ job per rendition plus a dependent finalize job
+HLS_TRANSCODE_MODE = os.environ.get("HLS_TRANSCODE_MODE", default="single_pass")
+
+# HLS delivery
+# - "django": stream files through the application server
+# - "x-accel-redirect": nginx sends the file from an internal location (HLS_ACCEL_REDIRECT_PREFIX)
+# - "x-sendfile": Apache/lighttpd send the file from its absolute path
+HLS_DELIVERY_MODE = os.environ.get("HLS_DELIVERY_MODE", default="django")
+HLS_ACCEL_REDIRECT_PREFIX = os.environ.get("HLS_ACCEL_REDIRECT_PREFIX", default="/protected/hls/")
+
+# Application server the entrypoint starts
+# - "wsgi": gunicorn with sync workers
+# - "asgi": uvicorn; HLS playlists and segments are served by the async views
+APP_SERVER = os.environ.get("APP_SERVER", default="wsgi")
+
+# Lifetime in seconds of the signed segment URLs written into HLS playlists
+HLS_SEGMENT_URL_TTL = 60 * 60 * 6
+
+# Seconds a replaced HLS version stays on disk before it is garbage-collected,
+# so clients still holding its playlist can finish playback (longer than HLS_SEGMENT_URL_TTL)
+HLS_VERSION_RETENTION = 60 * 60 * 12
+
+# Resumable source uploads (bytes): largest accepted file and largest chunk per PATCH request
+VIDEO_UPLOAD_MAX_SIZE = 20 * 1024 ** 3
+VIDEO_UPLOAD_MAX_CHUNK_SIZE = 64 * 1024 * 1024
+# Seconds an unfinished upload may stay idle before its session and part file are discarded
+VIDEO_UPLOAD_SESSION_MAX_AGE = 60 * 60 * 24
+
+# Seconds video lookups on the HLS hot path stay in the Redis cache
+VIDEO_CACHE_TIMEOUT = 60 * 60
+
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -168,6 +210,12 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 # Custom user model
 AUTH_USER_MODEL = "accounts.User"
 
+# Login by email (API) first, username (admin) second
+AUTHENTICATION_BACKENDS = [
+    "accounts.backends.EmailBackend",
+    "django.contrib.auth.backends.ModelBackend",
+]
+
 
 # Cookie settings for JWT
 # IMPORTANT:
@@ -183,11 +231,36 @@ AUTH_COOKIE_ACCESS_NAME = "access_token"
 AUTH_COOKIE_REFRESH_NAME = "refresh_token"
 
 
+# Users resolved by CookieJWTAuthentication are cached in Redis for the token lifetime
+# and in a small per-process LRU for at most USER_CACHE_LOCAL_TTL seconds.
+USER_CACHE_LOCAL_SIZE = 1024
+USER_CACHE_LOCAL_TTL = 30
+
+# Cron expression (UTC) of the RQ job that prunes expired JWT outstanding/blacklisted
+# tokens in batches of TOKEN_PRUNE_BATCH_SIZE and re-syncs the Redis blacklist
+TOKEN_MAINTENANCE_CRON = "0 3 * * *"
+TOKEN_PRUNE_BATCH_SIZE = 5000
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "accounts.authentication.CookieJWTAuthentication",
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    # Sliding-window limits of the auth endpoints (accounts.throttling):
+    # "<scope>" per client IP, "<scope>_account" per targeted email
+    "DEFAULT_THROTTLE_RATES": {
+        "login": "20/min",
+        "login_account": "5/min",
+        "register": "10/hour",
+        "register_account": "3/hour",
+        "password_reset": "10/hour",
+        "password_reset_account": "3/hour",
+        "token_refresh": "60/min",
+    },
+    # Reverse proxies in front of Django whose X-Forwarded-For entry is trusted:
+    # 0 when Django is exposed directly (REMOTE_ADDR is used), 1 behind a single nginx.
+    # Client-supplied X-Forwarded-For entries are never used to identify the client.
+    "NUM_PROXIES": int(os.environ.get("NUM_PROXIES", default=0)),
 }
 
 # Email (SMTP)
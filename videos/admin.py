@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Video
+from .models import UploadSession, Video
 
 @admin.register(Video)
 class VideoAdmin(admin.ModelAdmin):
@@ -8,4 +8,22 @@ class VideoAdmin(admin.ModelAdmin):
     list_display = ("id", "title", "category", "created_at")
     list_filter = ("category", "created_at")
     search_fields = ("title", "category")
-    readonly_fields = ("created_at",)
+    readonly_fields = (
+        "created_at",
+        "source_width",
+        "source_height",
+        "duration",
+        "source_bitrate",
+        "source_codec",
+        "hls_renditions",
+        "content_hash",
+        "thumbnail_derivatives",
+    )
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    """Admin overview of resumable uploads (created through the upload API)."""
+
+    list_display = ("id", "filename", "created_by", "offset", "size", "video", "updated_at")
+    readonly_fields = ("created_by", "filename", "size", "offset", "video", "created_at", "updated_at")
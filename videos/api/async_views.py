@@ -0,0 +1,96 @@
+from __future__ import annotations
+import asyncio
+import time
+from asgiref.sync import sync_to_async
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import APIException, NotAuthenticated
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from videos.api.delivery import aiter_file_range, serve_hls_content, serve_hls_file
+from videos.api.signing import build_segment_query, sign_playlist, verify_segment_signature
+from videos.api.views import (
+    _allowed_resolutions,
+    _get_hls_base_dir,
+    _get_recorded_renditions,
+    _get_segment_dir,
+    _safe_segment_name,
+)
+
+
+def _authenticate_user(request):
+    """
+    Authenticate like an APIView with IsAuthenticated: run DEFAULT_AUTHENTICATION_CLASSES
+    (access cookie, then Authorization: Bearer) and return (user, None) on success,
+    otherwise (None, 401 response) with the same detail and WWW-Authenticate header as DRF.
+    """
+    drf_request = Request(
+        request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    )
+    try:
+        user = drf_request.user
+        if not (user and user.is_authenticated):
+            raise NotAuthenticated()
+    except APIException as exc:
+        data = exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}
+        response = JsonResponse(data, status=401)
+        if drf_request.authenticators:
+            response["WWW-Authenticate"] = drf_request.authenticators[0].authenticate_header(drf_request)
+        return None, response
+    return user, None
+
+
+@require_safe
+async def hls_index(request, movie_id: int, resolution: str):
+    """
+    Async variant of HlsIndexView for ASGI servers (JWT required).
+    Token validation, the rendition lookup and the file read run outside the event loop.
+    """
+    user, error = await sync_to_async(_authenticate_user)(request)
+    if user is None:
+        return error
+
+    renditions = await sync_to_async(_get_recorded_renditions)(movie_id)
+    base_dir = _get_hls_base_dir(movie_id, resolution, _allowed_resolutions(renditions))
+    manifest_path = base_dir / "index.m3u8"
+
+    try:
+        playlist = await asyncio.to_thread(manifest_path.read_text)
+    except FileNotFoundError:
+        raise Http404("Manifest not found.")
+
+    query, _ = build_segment_query(user.id, movie_id, resolution)
+    return serve_hls_content(request, sign_playlist(playlist, query), "application/vnd.apple.mpegurl")
+
+
+@require_safe
+async def hls_segment(request, movie_id: int, resolution: str, segment: str):
+    """
+    Async variant of HlsSegmentView for ASGI servers (signed URL required).
+    The segment is streamed in chunks by aiter_file_range, so one process can
+    keep thousands of slow downloads open without tying up a worker each.
+    """
+    expires = verify_segment_signature(request.GET, movie_id, resolution)
+    if expires is None:
+        return JsonResponse({"detail": "Invalid or expired segment signature."}, status=403)
+
+    safe_name = _safe_segment_name(segment)
+
+    if not safe_name.lower().endswith(".ts"):
+        raise Http404("Segment not found.")
+
+    segment_dir = await asyncio.to_thread(_get_segment_dir, movie_id, resolution, safe_name)
+    segment_path = segment_dir / safe_name
+    if not await asyncio.to_thread(segment_path.exists):
+        raise Http404("Segment not found.")
+
+    return await asyncio.to_thread(
+        serve_hls_file,
+        request,
+        segment_path,
+        "video/MP2T",
+        immutable=True,
+        max_age=expires - int(time.time()),
+        stream=aiter_file_range,
+        public=True,
+    )
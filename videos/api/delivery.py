@@ -0,0 +1,213 @@
+from __future__ import annotations
+import asyncio
+import hashlib
+import os
+import re
+from pathlib import Path
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+RANGE_CHUNK_SIZE = 64 * 1024
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _hls_root() -> Path:
+    """Return the directory all HLS output is stored in."""
+    return Path(settings.MEDIA_ROOT) / "hls"
+
+
+def file_etag(stat: os.stat_result) -> str:
+    """Return a strong ETag derived from the file identity (inode, size, mtime)."""
+    return f'"{stat.st_ino:x}-{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def _internal_redirect_response(path: Path, content_type: str, mode: str) -> HttpResponse:
+    """
+    Return an empty response telling the front proxy which file to send.
+    - "x-accel-redirect" (nginx): internal URI below HLS_ACCEL_REDIRECT_PREFIX
+    - "x-sendfile" (Apache/lighttpd): absolute file path
+    """
+    response = HttpResponse(content_type=content_type)
+    if mode == "x-accel-redirect":
+        prefix = getattr(settings, "HLS_ACCEL_REDIRECT_PREFIX", "/protected/hls/").rstrip("/")
+        relative = path.resolve().relative_to(_hls_root().resolve())
+        response["X-Accel-Redirect"] = f"{prefix}/{relative.as_posix()}"
+    else:
+        response["X-Sendfile"] = str(path.resolve())
+    return response
+
+
+def _parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    Parse a single "bytes=start-end" range into inclusive offsets.
+    Returns None for headers that should be ignored (multiple ranges, other units)
+    and raises ValueError for ranges that cannot be satisfied.
+    """
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        length = int(end)
+        if length == 0:
+            raise ValueError("Empty suffix range.")
+        return max(size - length, 0), size - 1
+
+    first = int(start)
+    last = min(int(end), size - 1) if end else size - 1
+    if first >= size or first > last:
+        raise ValueError("Range not satisfiable.")
+    return first, last
+
+
+def _range_applies(request, etag: str, last_modified: int) -> bool:
+    """Return True unless an If-Range validator no longer matches the file."""
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def _iter_file_range(path: Path, start: int, length: int):
+    """Yield `length` bytes of a file starting at `start`."""
+    with open(path, "rb") as source:
+        source.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = source.read(min(RANGE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def aiter_file_range(path: Path, start: int, length: int):
+    """
+    Async variant of _iter_file_range for ASGI servers.
+    Every blocking read runs in a thread, so slow clients never block the event loop.
+    """
+    source = await asyncio.to_thread(open, path, "rb")
+    try:
+        await asyncio.to_thread(source.seek, start)
+        remaining = length
+        while remaining > 0:
+            chunk = await asyncio.to_thread(source.read, min(RANGE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        await asyncio.to_thread(source.close)
+
+
+def _file_response(
+    request, path: Path, content_type: str, stat: os.stat_result, etag: str, stream=None
+) -> HttpResponse:
+    """
+    Stream the file, honouring a single byte range with a 206 response.
+    `stream(path, start, length)` replaces the default iterators (e.g. aiter_file_range).
+    """
+    size = stat.st_size
+    range_header = request.META.get("HTTP_RANGE")
+    byte_range = None
+    if range_header and _range_applies(request, etag, int(stat.st_mtime)):
+        try:
+            byte_range = _parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+    if byte_range is None and stream is None:
+        response = FileResponse(open(path, "rb"), content_type=content_type)
+    elif byte_range is None:
+        response = StreamingHttpResponse(stream(path, 0, size), content_type=content_type)
+        response["Content-Length"] = str(size)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            (stream or _iter_file_range)(path, start, length), status=206, content_type=content_type
+        )
+        response["Content-Length"] = str(length)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+def _cache_control(immutable: bool, max_age: int, public: bool = False) -> str:
+    """Return the Cache-Control value for an HLS asset."""
+    if not immutable:
+        return REVALIDATE_CACHE_CONTROL
+    scope = "public" if public else "private"
+    return f"{scope}, max-age={max(max_age, 0)}, immutable"
+
+
+def serve_hls_file(
+    request,
+    path: Path,
+    content_type: str,
+    immutable: bool = False,
+    max_age: int = IMMUTABLE_MAX_AGE,
+    stream=None,
+    public: bool = False,
+) -> HttpResponse:
+    """
+    Deliver an HLS asset that already passed auth and existence checks.
+
+    - Sends ETag/Last-Modified and answers If-None-Match/If-Modified-Since with 304
+    - Finished segments are marked immutable (for max_age seconds), playlists must be revalidated
+    - `public` lets shared caches store immutable assets whose URL alone grants access (signed segments)
+    - HLS_DELIVERY_MODE selects whether Django streams the file itself ("django",
+      with byte-range support) or hands it to the front proxy
+      ("x-accel-redirect" / "x-sendfile")
+    - `stream` is passed on to _file_response (async views use aiter_file_range)
+    """
+    stat = path.stat()
+    etag = file_etag(stat)
+    last_modified = int(stat.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        mode = getattr(settings, "HLS_DELIVERY_MODE", "django")
+        if mode in ("x-accel-redirect", "x-sendfile"):
+            response = _internal_redirect_response(path, content_type, mode)
+        else:
+            response = _file_response(request, path, content_type, stat, etag, stream)
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = _cache_control(immutable, max_age, public)
+    return response
+
+
+def serve_hls_content(request, content: str, content_type: str) -> HttpResponse:
+    """
+    Deliver a playlist generated per request (e.g. with signed segment URIs).
+    The ETag is derived from the generated body, so unchanged playlists still get 304s.
+    No Last-Modified is sent: the body changes with every signing window while the
+    manifest file does not, so If-Modified-Since would keep expired signatures alive.
+    """
+    body = content.encode()
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type=content_type)
+
+    response["ETag"] = etag
+    response["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+    return response
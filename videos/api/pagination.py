@@ -0,0 +1,99 @@
+from datetime import datetime
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+class VideoCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (created_at, id), newest videos first.
+
+    DRF's CursorPagination keys on the first ordering field only and skips rows
+    sharing that value with an offset. Here the cursor position holds both
+    created_at and id, and pages are filtered with the row comparison
+    (created_at, id) < (position), which the video_created_id_idx index serves
+    directly, however many videos share a timestamp.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size = 24
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Same flow as CursorPagination.paginate_queryset, with the composite position filter."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = self._filter_by_position(queryset, current_position, reverse)
+
+        # Positions are unique, so the offset stays 0 for cursors issued here.
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def _filter_by_position(self, queryset, position: str, reverse: bool):
+        """Keep rows after `position` in the requested direction: (created_at, id) < or > position."""
+        try:
+            created_at, _, pk = position.partition("|")
+            created_at, pk = datetime.fromisoformat(created_at), int(pk)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+        # The ordering is descending, so a forward page continues with smaller keys.
+        suffix = "gt" if reverse else "lt"
+        return queryset.filter(
+            Q(**{f"created_at__{suffix}": created_at}) | Q(created_at=created_at, **{f"id__{suffix}": pk})
+        )
+
+    def _get_position_from_instance(self, instance, ordering) -> str:
+        """Return the composite position "<created_at ISO>|<id>" of a row or model instance."""
+        if isinstance(instance, dict):
+            created_at, pk = instance["created_at"], instance["id"]
+        else:
+            created_at, pk = instance.created_at, instance.id
+        return f"{created_at.isoformat()}|{pk}"
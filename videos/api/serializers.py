@@ -1,14 +1,41 @@
+from pathlib import Path
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.utils.encoding import filepath_to_uri
 from rest_framework import serializers
-from videos.models import Video
+from videos.models import UploadSession, Video
+
+
+VIDEO_LIST_FIELDS = (
+    "id", "created_at", "title", "description", "thumbnail", "thumbnail_derivatives", "category",
+)
+
+
+def build_thumbnail_srcset(derivatives: dict, url_for) -> dict | None:
+    """
+    Return one srcset string per image format, e.g.
+    {"webp": "<url> 320w, <url> 640w", "jpeg": "..."}, or None without derivatives.
+    """
+    srcset = {
+        ext: ", ".join(
+            f"{url_for(name)} {width}w"
+            for width, name in sorted(files.items(), key=lambda item: int(item[0]))
+        )
+        for ext, files in (derivatives or {}).items()
+        if files
+    }
+    return srcset or None
 
 class VideoSerializer(serializers.ModelSerializer):
     """Serializer matching the exact /api/video/ response schema."""
 
     thumbnail_url = serializers.SerializerMethodField()
+    thumbnail_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Video
-        fields = ("id", "created_at", "title", "description", "thumbnail_url", "category")
+        fields = ("id", "created_at", "title", "description", "thumbnail_url", "thumbnail_srcset", "category")
 
     def get_thumbnail_url(self, obj: Video) -> str | None:
         """Return an absolute URL for the thumbnail if available."""
@@ -18,3 +45,78 @@ class VideoSerializer(serializers.ModelSerializer):
         request = self.context.get("request")
         url = obj.thumbnail.url
         return request.build_absolute_uri(url) if request else url
+
+    def get_thumbnail_srcset(self, obj: Video) -> dict | None:
+        """Return absolute srcset strings of the resized WebP/JPEG thumbnails."""
+        request = self.context.get("request")
+        storage = obj.thumbnail.storage
+
+        def url_for(name: str) -> str:
+            url = storage.url(name)
+            return request.build_absolute_uri(url) if request else url
+
+        return build_thumbnail_srcset(obj.thumbnail_derivatives, url_for)
+
+
+def serialize_video_rows(rows, request=None) -> list[dict]:
+    """
+    Read-only fast path producing the exact VideoSerializer schema from
+    `.values(*VIDEO_LIST_FIELDS)` rows, without model instances or DRF field
+    machinery per row. The media base URL is built once for the whole list.
+    """
+    created_at_field = serializers.DateTimeField()
+    storage = Video._meta.get_field("thumbnail").storage
+
+    media_base = None
+    if isinstance(storage, FileSystemStorage):
+        media_base = request.build_absolute_uri(storage.base_url) if request else storage.base_url
+
+    def thumbnail_url(name: str) -> str | None:
+        if not name:
+            return None
+        if media_base is not None:
+            return media_base + filepath_to_uri(name).lstrip("/")
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request else url
+
+    return [
+        {
+            "id": row["id"],
+            "created_at": created_at_field.to_representation(row["created_at"]),
+            "title": row["title"],
+            "description": row["description"],
+            "thumbnail_url": thumbnail_url(row["thumbnail"]),
+            "thumbnail_srcset": build_thumbnail_srcset(row["thumbnail_derivatives"], thumbnail_url),
+            "category": row["category"],
+        }
+        for row in rows
+    ]
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Create and describe a resumable upload session (metadata of the future Video)."""
+
+    video_id = serializers.IntegerField(source="video.id", read_only=True, default=None)
+
+    class Meta:
+        model = UploadSession
+        fields = ("id", "title", "description", "category", "filename", "size", "offset", "video_id", "created_at")
+        read_only_fields = ("id", "offset", "video_id", "created_at")
+
+    def validate_filename(self, value: str) -> str:
+        """Keep only the base name and reject names no file can be stored under (e.g. "..")."""
+        name = Path(value).name
+        try:
+            default_storage.get_valid_name(name)
+        except SuspiciousFileOperation:
+            raise serializers.ValidationError("Enter a valid file name.")
+        return name
+
+    def validate_size(self, value: int) -> int:
+        """Reject empty uploads and files above VIDEO_UPLOAD_MAX_SIZE."""
+        max_size = getattr(settings, "VIDEO_UPLOAD_MAX_SIZE", 20 * 1024 ** 3)
+        if value <= 0:
+            raise serializers.ValidationError("Size must be greater than zero.")
+        if value > max_size:
+            raise serializers.ValidationError(f"Size must not exceed {max_size} bytes.")
+        return value
@@ -0,0 +1,66 @@
+from __future__ import annotations
+import time
+from urllib.parse import urlencode
+from django.conf import settings
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+
+_SALT = "videos.hls.segment"
+
+
+def segment_url_ttl() -> int:
+    """Return the lifetime of signed segment URLs in seconds."""
+    return int(getattr(settings, "HLS_SEGMENT_URL_TTL", 60 * 60 * 6))
+
+
+def _signature(user_id: int, movie_id: int, resolution: str, expires: int) -> str:
+    """Return the HMAC binding a segment URL to user, movie, resolution and expiry."""
+    value = f"{user_id}:{movie_id}:{resolution}:{expires}"
+    return salted_hmac(_SALT, value, algorithm="sha256").hexdigest()
+
+
+def build_segment_query(user_id: int, movie_id: int, resolution: str) -> tuple[str, int]:
+    """
+    Return the signed query string for segment URLs and its expiry timestamp.
+    The expiry is rounded up to the next TTL window, so the rewritten playlist
+    stays byte-identical (and cacheable) within that window.
+    """
+    ttl = segment_url_ttl()
+    expires = (int(time.time()) // ttl + 2) * ttl
+    query = urlencode({
+        "u": user_id,
+        "e": expires,
+        "s": _signature(user_id, movie_id, resolution, expires),
+    })
+    return query, expires
+
+
+def verify_segment_signature(params, movie_id: int, resolution: str) -> int | None:
+    """
+    Check the signed query parameters of a segment request without touching
+    the database. Returns the expiry timestamp if valid, otherwise None.
+    """
+    try:
+        user_id = int(params.get("u", ""))
+        expires = int(params.get("e", ""))
+    except ValueError:
+        return None
+
+    if expires < time.time():
+        return None
+
+    expected = _signature(user_id, movie_id, resolution, expires)
+    if not constant_time_compare(expected, params.get("s", "")):
+        return None
+    return expires
+
+
+def sign_playlist(content: str, query: str) -> str:
+    """Append the signed query to every segment URI of a media playlist."""
+    lines = []
+    for line in content.splitlines():
+        stripped = line.strip()
+        if stripped and not stripped.startswith("#"):
+            line = f"{stripped}/?{query}"
+        lines.append(line)
+    return "\n".join(lines) + "\n"
@@ -1,8 +1,39 @@
+from django.conf import settings
 from django.urls import path
-from videos.api.views import VideoListView, HlsIndexView, HlsSegmentView
+from videos.api import async_views
+from videos.api.views import (
+    VideoListView,
+    VideoCategoryListView,
+    HlsMasterView,
+    HlsIndexView,
+    HlsSegmentView,
+    TrickplayView,
+    UploadSessionCreateView,
+    UploadSessionDetailView,
+    UploadSessionCompleteView,
+)
 
 urlpatterns = [
     path("video/", VideoListView.as_view(), name="video-list"),
-    path("video/<int:movie_id>/<str:resolution>/index.m3u8", HlsIndexView.as_view(), name="hls-index"),
-    path("video/<int:movie_id>/<str:resolution>/<str:segment>/", HlsSegmentView.as_view(), name="hls-segment"),
+    path("video/categories/", VideoCategoryListView.as_view(), name="video-categories"),
+    path("video/uploads/", UploadSessionCreateView.as_view(), name="video-upload"),
+    path("video/uploads/<uuid:upload_id>/", UploadSessionDetailView.as_view(), name="video-upload-detail"),
+    path(
+        "video/uploads/<uuid:upload_id>/complete/",
+        UploadSessionCompleteView.as_view(),
+        name="video-upload-complete",
+    ),
+    path("video/<int:movie_id>/master.m3u8", HlsMasterView.as_view(), name="hls-master"),
+    path("video/<int:movie_id>/trickplay/<str:filename>", TrickplayView.as_view(), name="hls-trickplay"),
+]
+
+# Under ASGI the playlist and segment routes use the async views, which stream without blocking a worker.
+if getattr(settings, "APP_SERVER", "wsgi") == "asgi":
+    hls_index_view, hls_segment_view = async_views.hls_index, async_views.hls_segment
+else:
+    hls_index_view, hls_segment_view = HlsIndexView.as_view(), HlsSegmentView.as_view()
+
+urlpatterns += [
+    path("video/<int:movie_id>/<str:resolution>/index.m3u8", hls_index_view, name="hls-index"),
+    path("video/<int:movie_id>/<str:resolution>/<str:segment>/", hls_segment_view, name="hls-segment"),
 ]
@@ -1,29 +1,75 @@
 from __future__ import annotations
+import time
 from pathlib import Path
 from django.conf import settings
-from django.http import FileResponse, Http404
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
 from rest_framework import generics
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.views import APIView
-from videos.models import Video
-from videos.api.serializers import VideoSerializer
+from videos.models import UploadSession, Video
+from videos.cache import catalog_cache_key, catalog_etag, get_catalog_version, get_video_renditions
+from videos.catalog import DEFAULT_CATEGORY_LIMIT, MAX_CATEGORY_LIMIT, get_category_catalog
+from videos.api.serializers import VIDEO_LIST_FIELDS, UploadSessionSerializer, VideoSerializer, serialize_video_rows
+from videos.api.pagination import VideoCursorPagination
+from videos.api.delivery import serve_hls_content, serve_hls_file
+from videos.api.signing import build_segment_query, sign_playlist, verify_segment_signature
+from videos.publishing import published_hls_dir, trickplay_dir, version_hls_dir
+from videos.tasks import TRICKPLAY_VTT_NAME, enqueue_upload_expiry
+from videos.uploads import (
+    append_chunk,
+    assemble_upload,
+    discard_upload,
+    max_chunk_size,
+    restore_upload,
+    upload_part_path,
+)
 
 
 ALLOWED_RESOLUTIONS = {"480p", "720p", "1080p"}
 
 
-def _get_hls_base_dir(movie_id: int, resolution: str) -> Path:
-    """Return the base directory for HLS assets of a movie/resolution."""
-    if resolution not in ALLOWED_RESOLUTIONS:
+def _get_hls_base_dir(movie_id: int, resolution: str, allowed: set[str]) -> Path:
+    """Return the published directory for HLS assets of a movie/resolution."""
+    if resolution not in allowed:
         raise Http404("Resolution not supported.")
 
-    return Path(settings.MEDIA_ROOT) / "hls" / str(movie_id) / resolution
+    return published_hls_dir(movie_id) / resolution
 
 
-def _ensure_movie_exists(movie_id: int) -> None:
-    """Raise 404 if the referenced movie does not exist."""
-    if not Video.objects.filter(pk=movie_id).exists():
+def _get_segment_dir(movie_id: int, resolution: str, segment: str) -> Path:
+    """
+    Return the directory of a segment. Segment names start with their version
+    ("<version>-000.ts"), so playlists fetched before a re-transcode keep
+    working from the retained version until it is garbage-collected.
+    """
+    base_dir = _get_hls_base_dir(movie_id, resolution, ALLOWED_RESOLUTIONS)
+    version, separator, _ = segment.partition("-")
+    if separator:
+        retained = version_hls_dir(movie_id, version) / resolution
+        if retained.is_dir():
+            return retained
+    return base_dir
+
+
+def _get_recorded_renditions(movie_id: int) -> list[str]:
+    """Return the renditions recorded for a movie, raising 404 if it does not exist."""
+    renditions = get_video_renditions(movie_id)
+    if renditions is None:
         raise Http404("Video not found.")
+    return renditions
+
+
+def _allowed_resolutions(renditions: list[str]) -> set[str]:
+    """
+    Return the resolutions that may be served for a movie.
+    Movies converted before renditions were recorded fall back to ALLOWED_RESOLUTIONS.
+    """
+    return set(renditions) & ALLOWED_RESOLUTIONS if renditions else ALLOWED_RESOLUTIONS
 
 
 def _safe_segment_name(segment: str) -> str:
@@ -42,52 +88,322 @@ def _safe_segment_name(segment: str) -> str:
 
 
 class VideoListView(generics.ListAPIView):
-    """Return a list of all available videos (JWT required)."""
+    """
+    Return available videos, newest first, one cursor page at a time (JWT required).
+    Optional query params:
+    - category: only videos of this category
+    - page_size: videos per page (max 100)
+    """
 
     serializer_class = VideoSerializer
     permission_classes = [IsAuthenticated]
-    queryset = Video.objects.all()
+    pagination_class = VideoCursorPagination
+
+    def get_queryset(self):
+        queryset = Video.objects.all()
+        category = (self.request.query_params.get("category") or "").strip()
+        if category:
+            queryset = queryset.filter(category=category)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        """
+        Serve the page from the Redis cache, keyed by catalog version and URL.
+        The payload is the same for every user; the ETag lets clients revalidate with 304s.
+        """
+        version = get_catalog_version()
+        url = request.build_absolute_uri()
+        etag = catalog_etag(version, url)
+
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+        key = catalog_cache_key(version, url)
+        payload = cache.get(key)
+        if payload is None:
+            payload = self._build_page(request)
+            cache.set(key, payload, getattr(settings, "VIDEO_CACHE_TIMEOUT", 60 * 60))
+
+        response = Response(payload)
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+    def _build_page(self, request) -> dict:
+        """Serialize one page through the `.values()` fast path (same schema as VideoSerializer)."""
+        rows = self.filter_queryset(self.get_queryset()).values(*VIDEO_LIST_FIELDS)
+        page = self.paginate_queryset(rows)
+        return self.get_paginated_response(serialize_video_rows(page, request)).data
+
+
+class VideoCategoryListView(APIView):
+    """
+    Return every category with its newest videos (JWT required).
+    Optional query param `limit`: videos per category (default 10, max 50).
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        limit = self._get_limit(request.query_params)
+        version = get_catalog_version()
+        etag = catalog_etag(version, f"categories:{limit}")
+
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+        _, catalog = get_category_catalog(limit, version)
+
+        response = Response({"categories": self._absolute_thumbnails(request, catalog)})
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+    def _get_limit(self, params) -> int:
+        """Return the per-category limit, clamped to MAX_CATEGORY_LIMIT."""
+        try:
+            limit = int(params.get("limit", DEFAULT_CATEGORY_LIMIT))
+        except (TypeError, ValueError):
+            limit = DEFAULT_CATEGORY_LIMIT
+        return min(max(limit, 1), MAX_CATEGORY_LIMIT)
+
+    def _absolute_thumbnails(self, request, catalog: list[dict]) -> list[dict]:
+        """Turn the cached relative thumbnail URLs into absolute ones for this request."""
+        return [
+            {
+                "category": group["category"],
+                "videos": [self._absolute_video(request, video) for video in group["videos"]],
+            }
+            for group in catalog
+        ]
+
+    def _absolute_video(self, request, video: dict) -> dict:
+        """Return a copy of a cached video entry with absolute thumbnail URLs."""
+        video = dict(video)
+        if video["thumbnail_url"]:
+            video["thumbnail_url"] = request.build_absolute_uri(video["thumbnail_url"])
+        if video["thumbnail_srcset"]:
+            video["thumbnail_srcset"] = {
+                ext: ", ".join(
+                    f"{request.build_absolute_uri(url)} {width}"
+                    for url, width in (entry.rsplit(" ", 1) for entry in srcset.split(", "))
+                )
+                for ext, srcset in video["thumbnail_srcset"].items()
+            }
+        return video
+
+
+def _upload_response(session: UploadSession, status: int = 200, body: bool = True) -> Response:
+    """Return the session state in the body and as Upload-Offset/Upload-Length headers."""
+    response = Response(UploadSessionSerializer(session).data if body else None, status=status)
+    response["Upload-Offset"] = str(session.offset)
+    response["Upload-Length"] = str(session.size)
+    response["Cache-Control"] = "no-store"
+    return response
+
+
+class UploadSessionCreateView(generics.CreateAPIView):
+    """
+    Start a resumable upload of a source video (admin only).
+    Body: title, description, category, filename and the total size in bytes.
+    """
+
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsAdminUser]
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        session = serializer.save(created_by=request.user)
+        enqueue_upload_expiry()
+
+        response = _upload_response(session, status=201)
+        response["Location"] = request.build_absolute_uri(f"{session.id}/")
+        return response
+
+
+class UploadSessionMixin:
+    """Look up an upload session of the requesting admin."""
+
+    permission_classes = [IsAdminUser]
+
+    def get_session(self, upload_id, lock: bool = False) -> UploadSession:
+        queryset = UploadSession.objects.select_for_update() if lock else UploadSession.objects.all()
+        return get_object_or_404(queryset, pk=upload_id, created_by=self.request.user)
+
+
+class UploadSessionDetailView(UploadSessionMixin, APIView):
+    """
+    Resume an upload (admin only).
+    - GET/HEAD: current offset, to resume after a failure
+    - PATCH: append the raw request body at the offset given in the Upload-Offset header
+    - DELETE: abort the upload and discard the received bytes
+    """
+
+    def get(self, request, upload_id):
+        return _upload_response(self.get_session(upload_id))
+
+    def patch(self, request, upload_id):
+        try:
+            offset = int(request.headers["Upload-Offset"])
+        except (KeyError, ValueError):
+            return Response({"detail": "Upload-Offset header is required."}, status=400)
+
+        length = int(request.META.get("CONTENT_LENGTH") or 0)
+        if length > max_chunk_size():
+            return Response({"detail": f"Chunks must not exceed {max_chunk_size()} bytes."}, status=413)
+
+        session = self.get_session(upload_id)
+        if session.video_id:
+            return Response({"detail": "Upload already completed."}, status=409)
+        if offset != session.offset:
+            return _upload_response(session, status=409)
+        if session.offset + length > session.size:
+            return Response({"detail": "Chunk exceeds the declared upload size."}, status=413)
+
+        # No transaction here: a slow client must not hold a row lock or a DB connection.
+        if length and append_chunk(session, request.stream, length) is None:
+            return _upload_response(self.get_session(upload_id), status=409)
+        return _upload_response(session, status=204, body=False)
+
+    def delete(self, request, upload_id):
+        with transaction.atomic():
+            session = self.get_session(upload_id, lock=True)
+            if session.video_id:
+                return Response({"detail": "Upload already completed."}, status=409)
+            discard_upload(session)
+        return Response(status=204)
+
+
+class UploadSessionCompleteView(UploadSessionMixin, APIView):
+    """
+    Finish an upload (admin only): move the file into videos/ and create the Video,
+    which starts transcoding. Repeating the call returns the created video.
+    """
+
+    def post(self, request, upload_id):
+        session = assembled = None
+        try:
+            with transaction.atomic():
+                session = self.get_session(upload_id, lock=True)
+                if session.video_id:
+                    return _upload_response(session)
+
+                part_path = upload_part_path(session)
+                if (
+                    session.offset != session.size
+                    or not part_path.exists()
+                    or part_path.stat().st_size != session.size
+                ):
+                    return _upload_response(session, status=409)
+
+                assembled = assemble_upload(session)
+        except Exception:
+            # The commit failed after the file was moved: put it back so completion can be retried.
+            if assembled is not None:
+                restore_upload(session)
+            raise
+        return _upload_response(session, status=201)
+
+
+class HlsMasterView(APIView):
+    """Serve the adaptive-bitrate master playlist (master.m3u8) of a movie (JWT required)."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, movie_id: int):
+        _get_recorded_renditions(movie_id)
+
+        master_path = published_hls_dir(movie_id) / "master.m3u8"
+        if not master_path.exists():
+            raise Http404("Manifest not found.")
+
+        return serve_hls_file(request, master_path, "application/vnd.apple.mpegurl")
 
 
 class HlsIndexView(APIView):
-    """Serve the HLS playlist (index.m3u8) for a movie and resolution (JWT required)."""
+    """
+    Serve the HLS playlist (index.m3u8) for a movie and resolution (JWT required).
+    Every segment URI is rewritten to carry a short-lived signature bound to
+    the user, movie and resolution, so segment requests need no JWT or DB work.
+    """
 
     permission_classes = [IsAuthenticated]
 
     def get(self, request, movie_id: int, resolution: str):
-        _ensure_movie_exists(movie_id)
+        renditions = _get_recorded_renditions(movie_id)
 
-        base_dir = _get_hls_base_dir(movie_id, resolution)
+        base_dir = _get_hls_base_dir(movie_id, resolution, _allowed_resolutions(renditions))
         manifest_path = base_dir / "index.m3u8"
 
         if not manifest_path.exists():
             raise Http404("Manifest not found.")
 
-        return FileResponse(
-            open(manifest_path, "rb"),
-            content_type="application/vnd.apple.mpegurl",
-        )
+        query, _ = build_segment_query(request.user.id, movie_id, resolution)
+        content = sign_playlist(manifest_path.read_text(), query)
+        return serve_hls_content(request, content, "application/vnd.apple.mpegurl")
 
 
-class HlsSegmentView(APIView):
-    """Serve a single HLS TS segment for a movie and resolution (JWT required)."""
+class TrickplayView(APIView):
+    """
+    Serve the seek-preview assets of a movie (JWT required):
+    the WebVTT thumbnail track (thumbnails.vtt) and the sprite sheets it points to.
+    """
 
     permission_classes = [IsAuthenticated]
 
+    def get(self, request, movie_id: int, filename: str):
+        _get_recorded_renditions(movie_id)
+        safe_name = _safe_segment_name(filename)
+
+        if safe_name == TRICKPLAY_VTT_NAME:
+            content_type = "text/vtt"
+        elif safe_name.startswith("sprite-") and safe_name.lower().endswith(".jpg"):
+            content_type = "image/jpeg"
+        else:
+            raise Http404("Preview not found.")
+
+        preview_path = trickplay_dir(movie_id) / safe_name
+        if not preview_path.exists():
+            raise Http404("Preview not found.")
+
+        # Sprite names are reused when a new video file is uploaded, so clients revalidate via ETag.
+        return serve_hls_file(request, preview_path, content_type)
+
+
+class HlsSegmentView(APIView):
+    """
+    Serve a single HLS TS segment for a movie and resolution.
+    Access is granted by the signed URL issued by HlsIndexView only,
+    so no authentication, user or database lookup runs here.
+    """
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
     def get(self, request, movie_id: int, resolution: str, segment: str):
-        _ensure_movie_exists(movie_id)
+        expires = verify_segment_signature(request.query_params, movie_id, resolution)
+        if expires is None:
+            return Response({"detail": "Invalid or expired segment signature."}, status=403)
 
-        base_dir = _get_hls_base_dir(movie_id, resolution)
         safe_name = _safe_segment_name(segment)
 
         if not safe_name.lower().endswith(".ts"):
             raise Http404("Segment not found.")
 
-        segment_path = base_dir / safe_name
+        segment_path = _get_segment_dir(movie_id, resolution, safe_name) / safe_name
         if not segment_path.exists():
             raise Http404("Segment not found.")
 
-        return FileResponse(
-            open(segment_path, "rb"),
-            content_type="video/MP2T",
+        # Listed segments are complete; the signed URL changes once it expires.
+        # The URL is the credential, so shared caches and proxies may store the segment.
+        return serve_hls_file(
+            request,
+            segment_path,
+            "video/MP2T",
+            immutable=True,
+            max_age=expires - int(time.time()),
+            public=True,
         )
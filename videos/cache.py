@@ -0,0 +1,69 @@
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from .models import Video
+
+
+_MISSING = "missing"
+
+CATALOG_VERSION_KEY = "videos:catalog:version"
+
+
+def _renditions_key(video_id: int) -> str:
+    """Return the cache key holding the recorded renditions of a video."""
+    return f"videos:renditions:{video_id}"
+
+
+def get_video_renditions(video_id: int) -> list[str] | None:
+    """
+    Return the recorded renditions of a video, or None if it does not exist.
+    Results (including missing videos) are cached so the HLS hot path
+    does not hit the database for every playlist or segment request.
+    """
+    key = _renditions_key(video_id)
+    cached = cache.get(key)
+    if cached is not None:
+        return None if cached == _MISSING else cached
+
+    renditions = Video.objects.filter(pk=video_id).values_list("hls_renditions", flat=True).first()
+    timeout = getattr(settings, "VIDEO_CACHE_TIMEOUT", 60 * 60)
+    cache.set(key, _MISSING if renditions is None else renditions, timeout)
+    return renditions
+
+
+def invalidate_video(video_id: int) -> None:
+    """Drop cached lookups of a video after it was saved, converted or deleted."""
+    cache.delete(_renditions_key(video_id))
+
+
+def get_catalog_version() -> int:
+    """
+    Return the current catalog version.
+    A missing version starts at the current time in milliseconds, so a reset
+    Redis never brings back payloads cached under an older version.
+    """
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version() -> None:
+    """Invalidate every cached catalog payload by moving to a new version."""
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY, int(time.time() * 1000), None)
+
+
+def catalog_cache_key(version: int, url: str) -> str:
+    """Return the cache key of one catalog response (page, filter and host are part of the URL)."""
+    digest = hashlib.sha1(url.encode()).hexdigest()
+    return f"videos:catalog:{version}:{digest}"
+
+
+def catalog_etag(version: int, url: str) -> str:
+    """Return the ETag of a catalog response, which only changes with the catalog version."""
+    return f'"catalog-{version}-{hashlib.sha1(url.encode()).hexdigest()[:16]}"'
@@ -0,0 +1,56 @@
+from itertools import groupby
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from .api.serializers import VIDEO_LIST_FIELDS, serialize_video_rows
+from .cache import get_catalog_version
+from .models import Video
+
+
+DEFAULT_CATEGORY_LIMIT = 10
+MAX_CATEGORY_LIMIT = 50
+
+
+def _category_catalog_key(version: int, limit: int) -> str:
+    """Return the cache key of the grouped catalog for a version and per-category limit."""
+    return f"videos:catalog:{version}:categories:{limit}"
+
+
+def build_category_catalog(limit: int) -> list[dict]:
+    """
+    Return every category with its `limit` newest videos, built in a single query:
+    ROW_NUMBER() partitioned by category ranks the videos and the rank is filtered in SQL.
+    Thumbnail URLs are relative; the view makes them absolute per request.
+    """
+    ranked = (
+        Video.objects.annotate(
+            rank=Window(
+                RowNumber(),
+                partition_by=[F("category")],
+                order_by=[F("created_at").desc(), F("id").desc()],
+            )
+        )
+        .filter(rank__lte=limit)
+        .order_by("category", "rank")
+        .values(*VIDEO_LIST_FIELDS)
+    )
+    return [
+        {"category": category, "videos": serialize_video_rows(rows)}
+        for category, rows in groupby(ranked, key=lambda row: row["category"])
+    ]
+
+
+def get_category_catalog(limit: int, version: int | None = None) -> tuple[int, list[dict]]:
+    """
+    Return (catalog version, grouped catalog), building and caching it on a miss.
+    Pass the version already read (e.g. for an ETag) so the payload matches it.
+    """
+    if version is None:
+        version = get_catalog_version()
+    key = _category_catalog_key(version, limit)
+    catalog = cache.get(key)
+    if catalog is None:
+        catalog = build_category_catalog(limit)
+        cache.set(key, catalog, getattr(settings, "VIDEO_CACHE_TIMEOUT", 60 * 60))
+    return version, catalog
@@ -0,0 +1,58 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+
+from videos.api.serializers import VIDEO_LIST_FIELDS, VideoSerializer, serialize_video_rows
+from videos.models import Video
+
+
+class Command(BaseCommand):
+    """Compare VideoSerializer with the `.values()` fast path on a temporary catalog."""
+
+    help = "Microbenchmark of the video list serialization (rows are rolled back afterwards)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get("/api/video/", HTTP_HOST=settings.ALLOWED_HOSTS[0])
+
+        with transaction.atomic():
+            Video.objects.bulk_create([
+                Video(
+                    title=f"Benchmark {index}",
+                    description="Benchmark description",
+                    category=f"Category {index % 10}",
+                    thumbnail=f"thumbnail/benchmark-{index}.png",
+                    video_file=f"videos/benchmark-{index}.mp4",
+                )
+                for index in range(options["rows"])
+            ])
+            queryset = Video.objects.order_by("-created_at", "-id")
+
+            serializer_time = self._best_of(
+                options["repeat"],
+                lambda: VideoSerializer(queryset.all(), many=True, context={"request": request}).data,
+            )
+            fast_path_time = self._best_of(
+                options["repeat"],
+                lambda: serialize_video_rows(queryset.values(*VIDEO_LIST_FIELDS), request),
+            )
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"rows:           {options['rows']}")
+        self.stdout.write(f"VideoSerializer: {serializer_time * 1000:.1f} ms")
+        self.stdout.write(f"fast path:       {fast_path_time * 1000:.1f} ms")
+        self.stdout.write(self.style.SUCCESS(f"speedup:         {serializer_time / fast_path_time:.1f}x"))
+
+    def _best_of(self, repeat: int, func) -> float:
+        """Return the fastest of `repeat` runs in seconds (query included)."""
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-17 07:19
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction; the indexes are
+    # built without blocking writes to a large video table.
+    atomic = False
+
+    dependencies = [
+        ('videos', '0006_video_content_hash'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='video',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        AddIndexConcurrently(
+            model_name='video',
+            index=models.Index(fields=['-created_at', '-id'], name='video_created_id_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='video',
+            index=models.Index(fields=['category', '-created_at', '-id'], name='video_category_created_idx'),
+        ),
+    ]
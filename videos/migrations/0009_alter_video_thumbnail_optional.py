@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 07:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0008_video_thumbnail_derivatives'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='video',
+            name='thumbnail',
+            field=models.ImageField(blank=True, upload_to='thumbnail/'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 08:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0010_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='source_frame_rate',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import uuid
+from django.conf import settings
 from django.db import models
 from django.core.exceptions import ValidationError
 
@@ -7,12 +9,58 @@ class Video(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     category = models.CharField(max_length=100)
-    thumbnail = models.ImageField(upload_to="thumbnail/", blank=False, null=False) 
+    # Optional: without an upload, a poster frame is extracted from the video after transcoding.
+    thumbnail = models.ImageField(upload_to="thumbnail/", blank=True, null=False)
     video_file = models.FileField(upload_to="videos/", blank=False, null=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Source metadata recorded by ffprobe before transcoding.
+    source_width = models.PositiveIntegerField(null=True, blank=True)
+    source_height = models.PositiveIntegerField(null=True, blank=True)
+    duration = models.FloatField(null=True, blank=True)
+    source_bitrate = models.PositiveBigIntegerField(null=True, blank=True)
+    source_codec = models.CharField(max_length=50, blank=True)
+    source_frame_rate = models.FloatField(null=True, blank=True)
+    hls_renditions = models.JSONField(default=list, blank=True)
+
+    # SHA-256 of the source file, used to reuse the HLS output of identical uploads.
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+
+    # Resized thumbnail files per format and width, e.g. {"webp": {"320": "thumbnail/derivatives/..."}}.
+    thumbnail_derivatives = models.JSONField(default=dict, blank=True)
+
     class Meta:
-        ordering = ["-created_at"]
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="video_created_id_idx"),
+            models.Index(fields=["category", "-created_at", "-id"], name="video_category_created_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.title
+
+
+class UploadSession(models.Model):
+    """
+    A resumable, chunked upload of a source video.
+    Chunks are appended to media/uploads/<id>.part; the Video row is only
+    created once every byte has arrived and the file was moved into videos/.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="upload_sessions")
+
+    # Metadata of the Video created on completion.
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    category = models.CharField(max_length=100)
+    filename = models.CharField(max_length=255)
+
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    video = models.OneToOneField(Video, null=True, blank=True, on_delete=models.SET_NULL, related_name="upload_session")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.filename} ({self.offset}/{self.size})"
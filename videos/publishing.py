@@ -0,0 +1,144 @@
+from __future__ import annotations
+import os
+import secrets
+import shutil
+import time
+from pathlib import Path
+from django.conf import settings
+
+
+# Layout of media/hls/<video_id>/:
+#   staging/<version>/             output being written, never served
+#   versions/<version>/            published HLS trees (<res>/index.m3u8, <version>-NNN.ts, master.m3u8)
+#   current -> versions/<version>  published-version marker, swapped atomically
+#   trickplay-versions/<version>/  published seek previews
+#   trickplay -> trickplay-versions/<version>
+STAGING_DIR = "staging"
+VERSIONS_DIR = "versions"
+CURRENT_LINK = "current"
+TRICKPLAY_VERSIONS_DIR = "trickplay-versions"
+TRICKPLAY_LINK = "trickplay"
+
+LAYOUT_NAMES = {STAGING_DIR, VERSIONS_DIR, CURRENT_LINK, TRICKPLAY_VERSIONS_DIR, TRICKPLAY_LINK}
+
+# Unpublished staging directories older than this are treated as abandoned.
+STAGING_MAX_AGE = 60 * 60 * 24
+
+
+def video_hls_dir(video_id: int) -> Path:
+    """Return the directory holding every HLS version of a video."""
+    return Path(settings.MEDIA_ROOT) / "hls" / str(video_id)
+
+
+def published_hls_dir(video_id: int) -> Path:
+    """
+    Return the published HLS tree of a video.
+    Videos converted before versioning keep their renditions directly in media/hls/<id>/.
+    """
+    current = video_hls_dir(video_id) / CURRENT_LINK
+    return current if current.is_symlink() else video_hls_dir(video_id)
+
+
+def version_hls_dir(video_id: int, version: str) -> Path:
+    """Return the directory of one published HLS version (it may already be collected)."""
+    return video_hls_dir(video_id) / VERSIONS_DIR / version
+
+
+def trickplay_dir(video_id: int) -> Path:
+    """Return the published directory holding the sprite sheets and WebVTT track of a video."""
+    return video_hls_dir(video_id) / TRICKPLAY_LINK
+
+
+def new_version() -> str:
+    """Return a fresh version name (also used as segment file name prefix)."""
+    return secrets.token_hex(6)
+
+
+def staging_dir(video_id: int, version: str) -> Path:
+    """Return the directory a version is written to before it is published."""
+    return video_hls_dir(video_id) / STAGING_DIR / version
+
+
+def publish_hls_version(video_id: int, version: str) -> Path:
+    """Move a finished staging tree into versions/ and point `current` at it."""
+    return _publish(video_id, version, VERSIONS_DIR, CURRENT_LINK)
+
+
+def publish_trickplay_version(video_id: int, version: str) -> Path:
+    """Move finished seek previews into trickplay-versions/ and point `trickplay` at them."""
+    return _publish(video_id, version, TRICKPLAY_VERSIONS_DIR, TRICKPLAY_LINK)
+
+
+def _publish(video_id: int, version: str, store: str, link_name: str) -> Path:
+    """
+    Publish a staging directory. The directory is renamed (same filesystem) and
+    the symlink is replaced with os.replace, so readers either see the old or the
+    new version in full, never a mix or a half-written playlist.
+    """
+    base = video_hls_dir(video_id)
+    target = base / store / version
+    target.parent.mkdir(parents=True, exist_ok=True)
+    os.rename(staging_dir(video_id, version), target)
+    _swap_link(base / link_name, Path(store) / version)
+    return target
+
+
+def _swap_link(link: Path, target: Path) -> None:
+    """Atomically point `link` at `target` (relative), retiring the previous version."""
+    previous = link.resolve() if link.is_symlink() else None
+    if link.is_dir() and not link.is_symlink():
+        # Unversioned output of an older release: move it aside for collection.
+        (link.parent / STAGING_DIR).mkdir(parents=True, exist_ok=True)
+        os.rename(link, link.parent / STAGING_DIR / f"legacy-{link.name}-{secrets.token_hex(4)}")
+
+    temporary = link.parent / f".{link.name}-{secrets.token_hex(4)}"
+    os.symlink(target, temporary)
+    os.replace(temporary, link)
+
+    # The retirement time starts the retention period of the previous version.
+    if previous is not None and previous.exists() and previous != link.resolve():
+        os.utime(previous)
+
+
+def collect_garbage(video_id: int, retention: int) -> list[Path]:
+    """
+    Delete what readers can no longer reach:
+    - versions retired more than `retention` seconds ago (in-flight playlists keep working until then)
+    - staging directories older than STAGING_MAX_AGE (failed or abandoned conversions)
+    - unversioned renditions once a versioned tree is published
+    Returns the removed paths.
+    """
+    base = video_hls_dir(video_id)
+    if not base.is_dir():
+        return []
+
+    now = time.time()
+    published = {
+        (base / link).resolve() for link in (CURRENT_LINK, TRICKPLAY_LINK) if (base / link).is_symlink()
+    }
+    candidates = []
+    for store in (VERSIONS_DIR, TRICKPLAY_VERSIONS_DIR):
+        candidates += [
+            (path, retention) for path in _children(base / store) if path.resolve() not in published
+        ]
+    candidates += [(path, STAGING_MAX_AGE) for path in _children(base / STAGING_DIR)]
+    if (base / CURRENT_LINK).is_symlink():
+        candidates += [
+            (path, retention) for path in _children(base)
+            if path.name not in LAYOUT_NAMES and not path.name.startswith(".")
+        ]
+
+    removed = []
+    for path, max_age in candidates:
+        if now - path.lstat().st_mtime < max_age:
+            continue
+        if path.is_dir() and not path.is_symlink():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            path.unlink(missing_ok=True)
+        removed.append(path)
+    return removed
+
+
+def _children(directory: Path) -> list[Path]:
+    return list(directory.iterdir()) if directory.is_dir() else []
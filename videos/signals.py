@@ -1,48 +1,105 @@
-import shutil
 from pathlib import Path
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.db import transaction
-import django_rq
-from django.conf import settings
+from .cache import bump_catalog_version, invalidate_video
 from .models import Video
-from .tasks import convert_video_to_hls
+from .tasks import (
+    enqueue_catalog_warmup,
+    enqueue_hls_conversion,
+    enqueue_poster_extraction,
+    enqueue_thumbnail_derivatives,
+    move_to_trash,
+    thumbnail_derivatives_dir,
+)
+from .publishing import video_hls_dir
+
+
+@receiver(pre_save, sender=Video)
+def video_pre_save(sender, instance: Video, **kwargs):
+    """
+    Before saving:
+    remember whether the video file or thumbnail differ from the stored ones.
+    """
+    stored = None
+    if instance.pk:
+        stored = Video.objects.filter(pk=instance.pk).values_list("video_file", "thumbnail").first()
+
+    if stored is None:
+        instance._video_file_changed = True
+        instance._thumbnail_changed = True
+        return
+
+    instance._video_file_changed = stored[0] != instance.video_file.name
+    instance._thumbnail_changed = stored[1] != instance.thumbnail.name
 
 
 @receiver(post_save, sender=Video)
 def video_post_save(sender, instance: Video, created: bool, **kwargs):
     """
     After video upload:
-    enqueue HLS conversion in background.
+    enqueue HLS conversion and thumbnail derivatives in background.
+    A cleared thumbnail drops its derivatives and gets a new poster frame.
+    Metadata-only saves keep the existing HLS output;
+    cached lookups of the video and the catalog are invalidated on every save.
     """
+    video_id = instance.pk
+    transaction.on_commit(lambda: invalidate_video(video_id))
+    transaction.on_commit(bump_catalog_version)
+    transaction.on_commit(enqueue_catalog_warmup)
+
+    thumbnail_changed = created or getattr(instance, "_thumbnail_changed", True)
+    if instance.thumbnail and thumbnail_changed:
+        transaction.on_commit(lambda: enqueue_thumbnail_derivatives(video_id))
+    elif thumbnail_changed and not created:
+        _clear_thumbnail_derivatives(instance)
 
     if not instance.video_file:
         return
 
+    if not created and not getattr(instance, "_video_file_changed", True):
+        if thumbnail_changed and not instance.thumbnail and instance.hls_renditions:
+            transaction.on_commit(lambda: enqueue_poster_extraction(video_id))
+        return
+
+    file_name = instance.video_file.name
+
     def enqueue_task():
-        queue = django_rq.get_queue("default")
-        queue.enqueue(convert_video_to_hls, instance.pk)
+        enqueue_hls_conversion(video_id, file_name)
 
     transaction.on_commit(enqueue_task)
 
 
+def _clear_thumbnail_derivatives(instance: Video) -> None:
+    """Reset the srcset of a removed thumbnail and trash its resized copies after commit."""
+    video_id = instance.pk
+    if instance.thumbnail_derivatives:
+        instance.thumbnail_derivatives = {}
+        Video.objects.filter(pk=video_id).update(thumbnail_derivatives={})
+    transaction.on_commit(lambda: move_to_trash([thumbnail_derivatives_dir(video_id)]))
+
+
 @receiver(post_delete, sender=Video)
 def video_post_delete(sender, instance: Video, **kwargs):
     """
     Cleanup files when video is deleted.
+    After commit the source, thumbnail, derivatives and HLS tree are only renamed
+    into media/trash/; an RQ job unlinks them in batches, so deletes stay instant.
+    HLS output reused from identical uploads is hard-linked, so removing this
+    title's tree only drops its references; the shared data is freed by the
+    filesystem once the last title linking it is deleted.
     """
-    if instance.video_file:
-        try:
-            Path(instance.video_file.path).unlink(missing_ok=True)
-        except Exception:
-            pass
-
-    if instance.thumbnail:
-        try:
-            Path(instance.thumbnail.path).unlink(missing_ok=True)
-        except Exception:
-            pass
-
-    hls_dir = Path(settings.MEDIA_ROOT) / "hls" / str(instance.pk)
-    if hls_dir.exists():
-        shutil.rmtree(hls_dir)
+    video_id = instance.pk
+    transaction.on_commit(lambda: invalidate_video(video_id))
+    transaction.on_commit(bump_catalog_version)
+    transaction.on_commit(enqueue_catalog_warmup)
+
+    paths = [thumbnail_derivatives_dir(video_id), video_hls_dir(video_id)]
+    for field_file in (instance.video_file, instance.thumbnail):
+        if field_file:
+            try:
+                paths.append(Path(field_file.path))
+            except Exception:
+                pass
+
+    transaction.on_commit(lambda: move_to_trash(paths))
@@ -1,7 +1,28 @@
+import hashlib
+import json
+import os
+import secrets
+import shutil
 import subprocess
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+import django_rq
 from django.conf import settings
-from .models import Video
+from PIL import Image, ImageOps
+from rq.job import Dependency, JobStatus
+from .cache import bump_catalog_version, invalidate_video
+from .catalog import DEFAULT_CATEGORY_LIMIT, get_category_catalog
+from .models import UploadSession, Video
+from .publishing import (
+    collect_garbage,
+    new_version,
+    publish_hls_version,
+    publish_trickplay_version,
+    published_hls_dir,
+    staging_dir,
+    trickplay_dir,
+)
+from .uploads import expire_upload_sessions, upload_session_max_age
 
 
 RESOLUTIONS = {
@@ -10,35 +31,866 @@ RESOLUTIONS = {
     "1080p": 1080,
 }
 
+VIDEO_BITRATES = {
+    "480p": 1_400_000,
+    "720p": 2_800_000,
+    "1080p": 5_000_000,
+}
 
-def convert_video_to_hls(video_id: int) -> None:
+# H.264 levels as (level, max macroblocks per frame, max macroblocks per second).
+# The bitrate limits of these levels are well above VIDEO_BITRATES.
+H264_LEVEL_LIMITS = [
+    ("3.0", 1620, 40500),
+    ("3.1", 3600, 108000),
+    ("3.2", 5120, 216000),
+    ("4.0", 8192, 245760),
+    ("4.2", 8704, 522240),
+    ("5.1", 36864, 983040),
+    ("5.2", 36864, 2073600),
+]
+
+# Assumed when ffprobe reports no frame rate or no source dimensions.
+DEFAULT_FRAME_RATE = 30.0
+DEFAULT_ASPECT_RATIO = 16 / 9
+
+AUDIO_BITRATE = 128_000
+
+HLS_SEGMENT_SECONDS = 6
+
+
+def h264_level(width: int, height: int, frame_rate: float) -> str:
+    """Return the lowest H.264 level whose frame size and macroblock rate fit the output."""
+    frame_size = -(-width // 16) * -(-height // 16)
+    for level, max_frame_size, max_rate in H264_LEVEL_LIMITS:
+        if frame_size <= max_frame_size and frame_size * frame_rate <= max_rate:
+            return level
+    return H264_LEVEL_LIMITS[-1][0]
+
+
+def rendition_levels(video: Video, ladder: dict[str, int]) -> dict[str, str]:
     """
-    Convert uploaded video into HLS format for 480p, 720p and 1080p.
-    Output:
-        media/hls/<video_id>/<resolution>/index.m3u8
+    Return the H.264 level of every rendition, from its scaled size (scale=-2:<height>)
+    and the source frame rate, so 50/60 fps sources are not encoded out of spec.
+    """
+    frame_rate = video.source_frame_rate or DEFAULT_FRAME_RATE
+    aspect = (
+        video.source_width / video.source_height
+        if video.source_width and video.source_height else DEFAULT_ASPECT_RATIO
+    )
+    levels = {}
+    for label, height in ladder.items():
+        width = round(height * aspect / 2) * 2
+        levels[label] = h264_level(width, height, frame_rate)
+    return levels
+
+
+def _hls_output_args(output_dir: Path, label: str, version: str, level: str) -> list[str]:
+    """
+    Return the encoder and HLS muxer options for one rendition output.
+    Keyframes are forced on segment boundaries so players can switch renditions cleanly.
+    Segment names carry the output version, so every version has its own segment URLs.
     """
+    bitrate = VIDEO_BITRATES[label]
+    return [
+        "-c:v", "libx264", "-profile:v", "high", "-level:v", level,
+        "-pix_fmt", "yuv420p",
+        "-b:v", str(bitrate), "-maxrate", str(bitrate), "-bufsize", str(bitrate * 2),
+        "-force_key_frames", f"expr:gte(t,n_forced*{HLS_SEGMENT_SECONDS})", "-sc_threshold", "0",
+        "-c:a", "aac", "-b:a", str(AUDIO_BITRATE),
+        "-hls_time", str(HLS_SEGMENT_SECONDS), "-hls_list_size", "0",
+        "-hls_playlist_type", "vod",
+        "-hls_segment_filename", str(output_dir / f"{version}-%03d.ts"),
+        str(output_dir / "index.m3u8"),
+    ]
 
+
+def build_single_pass_command(
+    input_path: Path, base_output_dir: Path, ladder: dict[str, int], version: str, levels: dict[str, str]
+) -> list[str]:
+    """
+    Build one ffmpeg command that decodes the source once and
+    splits the decoded stream into every rendition of the ladder.
+    """
+    labels = list(ladder)
+    split_outputs = "".join(f"[v{index}]" for index in range(len(labels)))
+    filters = [f"[0:v]split={len(labels)}{split_outputs}"]
+    filters += [
+        f"[v{index}]scale=-2:{ladder[label]}[out{index}]"
+        for index, label in enumerate(labels)
+    ]
+
+    cmd = ["ffmpeg", "-y", "-i", str(input_path), "-filter_complex", ";".join(filters)]
+    for index, label in enumerate(labels):
+        cmd += ["-map", f"[out{index}]", "-map", "0:a?"]
+        cmd += _hls_output_args(base_output_dir / label, label, version, levels[label])
+    return cmd
+
+
+def build_rendition_command(
+    input_path: Path, output_dir: Path, label: str, height: int, version: str, level: str
+) -> list[str]:
+    """Build an ffmpeg command that encodes a single rendition."""
+    return [
+        "ffmpeg", "-y", "-i", str(input_path),
+        "-vf", f"scale=-2:{height}",
+        *_hls_output_args(output_dir, label, version, level),
+    ]
+
+
+def _get_source(video_id: int) -> tuple[Video, Path] | tuple[None, None]:
+    """Return the video and its source path, or (None, None) if it cannot be converted."""
     video = Video.objects.filter(pk=video_id).first()
     if not video or not video.video_file:
-        return
+        return None, None
 
     input_path = Path(video.video_file.path)
     if not input_path.exists():
+        return None, None
+    return video, input_path
+
+
+def probe_video(input_path: Path) -> dict:
+    """
+    Read width, height, frame rate, duration, bitrate and codec of the first video stream
+    with ffprobe. Missing values are returned as None (or "" for the codec).
+    """
+    cmd = [
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-show_entries",
+        "stream=width,height,codec_name,bit_rate,avg_frame_rate,r_frame_rate:format=duration,bit_rate",
+        "-of", "json", str(input_path),
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    try:
+        data = json.loads(result.stdout or "{}")
+    except ValueError:
+        data = {}
+
+    stream = (data.get("streams") or [{}])[0]
+    fmt = data.get("format") or {}
+    return {
+        "source_width": _to_number(stream.get("width"), int),
+        "source_height": _to_number(stream.get("height"), int),
+        "duration": _to_number(fmt.get("duration"), float),
+        "source_bitrate": _to_number(stream.get("bit_rate") or fmt.get("bit_rate"), int),
+        "source_codec": stream.get("codec_name") or "",
+        "source_frame_rate": _parse_frame_rate(stream.get("avg_frame_rate"))
+        or _parse_frame_rate(stream.get("r_frame_rate")),
+    }
+
+
+def _parse_frame_rate(value) -> float | None:
+    """Parse an ffprobe rate such as "60000/1001"; "0/0" and invalid values give None."""
+    numerator, _, denominator = str(value or "").partition("/")
+    try:
+        rate = float(numerator) / float(denominator or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return round(rate, 3) if rate > 0 else None
+
+
+def _to_number(value, cast):
+    """Cast an ffprobe value to a number, returning None for missing or invalid values."""
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def select_renditions(source_height: int | None) -> dict[str, int]:
+    """
+    Return the rendition ladder (label -> output height) for a source.
+    Only renditions at or below the source height are kept; a source smaller than
+    the lowest rendition gets that rendition at its own height instead of an upscale.
+    """
+    if not source_height:
+        return dict(RESOLUTIONS)
+
+    ladder = {label: height for label, height in RESOLUTIONS.items() if height <= source_height}
+    if not ladder:
+        lowest = min(RESOLUTIONS, key=RESOLUTIONS.get)
+        ladder = {lowest: source_height - source_height % 2}
+    return ladder
+
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+PROBE_FIELDS = ("source_width", "source_height", "duration", "source_bitrate", "source_codec", "source_frame_rate")
+
+
+def hash_file(path: Path) -> str:
+    """Return the SHA-256 hex digest of a file, read as a stream in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _find_transcoded_duplicate(video: Video, content_hash: str) -> Video | None:
+    """Return another, already transcoded video with the same source content."""
+    candidates = (
+        Video.objects.filter(content_hash=content_hash)
+        .exclude(pk=video.pk)
+        .exclude(hls_renditions=[])
+        .order_by("created_at")
+    )
+    for candidate in candidates:
+        if (published_hls_dir(candidate.id) / "master.m3u8").exists():
+            return candidate
+    return None
+
+
+def link_hls_tree(source_dir: Path, target_dir: Path) -> None:
+    """
+    Recreate source_dir under target_dir using hard links, so identical titles share
+    segment data on disk. Files are copied when hard links are not possible.
+    """
+    for source_path in source_dir.rglob("*"):
+        target_path = target_dir / source_path.relative_to(source_dir)
+        if source_path.is_dir():
+            target_path.mkdir(parents=True, exist_ok=True)
+            continue
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        target_path.unlink(missing_ok=True)
+        try:
+            os.link(source_path, target_path)
+        except OSError:
+            shutil.copy2(source_path, target_path)
+
+
+def _reuse_duplicate_output(video: Video, content_hash: str) -> bool:
+    """
+    Reuse the HLS output of an identical, already transcoded upload.
+    Returns True if the output was reused and no encode is needed.
+    """
+    duplicate = _find_transcoded_duplicate(video, content_hash)
+    if not duplicate:
+        return False
+
+    version = new_version()
+    link_hls_tree(published_hls_dir(duplicate.id), staging_dir(video.id, version))
+    publish_hls_version(video.id, version)
+
+    if (trickplay_dir(duplicate.id) / TRICKPLAY_VTT_NAME).exists():
+        trickplay_version = new_version()
+        link_hls_tree(trickplay_dir(duplicate.id), staging_dir(video.id, trickplay_version))
+        publish_trickplay_version(video.id, trickplay_version)
+
+    metadata = {field: getattr(duplicate, field) for field in PROBE_FIELDS}
+    Video.objects.filter(pk=video.pk).update(hls_renditions=duplicate.hls_renditions, **metadata)
+    invalidate_video(video.pk)
+    enqueue_hls_garbage_collection(video.pk)
+    return True
+
+
+def _probe_and_plan(video: Video, input_path: Path) -> dict[str, int]:
+    """Store the ffprobe metadata on the video and return its rendition ladder."""
+    metadata = probe_video(input_path)
+    Video.objects.filter(pk=video.pk).update(**metadata)
+    for field, value in metadata.items():
+        setattr(video, field, value)
+    return select_renditions(metadata["source_height"])
+
+
+ACTIVE_JOB_STATUSES = {JobStatus.QUEUED, JobStatus.STARTED, JobStatus.DEFERRED, JobStatus.SCHEDULED}
+
+
+def hls_job_id(video_id: int, file_name: str, step: str = "convert") -> str:
+    """Return a deterministic RQ job id for one conversion step of a video file version."""
+    version = hashlib.sha1(file_name.encode()).hexdigest()[:12]
+    return f"hls-{video_id}-{version}-{step}"
+
+
+def _is_job_active(queue, job_id: str) -> bool:
+    """Return True if a job with this id is queued, running or waiting on dependencies."""
+    job = queue.fetch_job(job_id)
+    return job is not None and job.get_status() in ACTIVE_JOB_STATUSES
+
+
+def enqueue_hls_conversion(video_id: int, file_name: str) -> bool:
+    """
+    Enqueue convert_video_to_hls unless a conversion of the same
+    video and file version is already queued or running.
+    Returns True if a job was enqueued.
+    """
+    queue = django_rq.get_queue("default")
+    job_id = hls_job_id(video_id, file_name)
+    if _is_job_active(queue, job_id) or _is_job_active(queue, hls_job_id(video_id, file_name, "finalize")):
+        return False
+
+    queue.enqueue(convert_video_to_hls, video_id, job_id=job_id)
+    return True
+
+
+CATALOG_WARMUP_JOB_ID = "catalog-warmup"
+
+
+def enqueue_catalog_warmup() -> None:
+    """Enqueue a rebuild of the grouped catalog unless one is already waiting."""
+    queue = django_rq.get_queue("default")
+    if _is_job_active(queue, CATALOG_WARMUP_JOB_ID):
+        return
+    queue.enqueue(warm_category_catalog, job_id=CATALOG_WARMUP_JOB_ID)
+
+
+def warm_category_catalog() -> None:
+    """Precompute the grouped catalog for the current catalog version into the cache."""
+    get_category_catalog(DEFAULT_CATEGORY_LIMIT)
+
+
+THUMBNAIL_WIDTHS = (320, 640, 1280)
+
+THUMBNAIL_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 6}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def thumbnail_derivatives_dir(video_id: int) -> Path:
+    """Return the directory holding the resized thumbnails of a video."""
+    return Path(settings.MEDIA_ROOT) / "thumbnail" / "derivatives" / str(video_id)
+
+
+def generate_thumbnail_derivatives(video_id: int) -> None:
+    """
+    Create WebP and JPEG copies of the thumbnail at THUMBNAIL_WIDTHS.
+    Widths above the original are skipped (the original width is used if all are).
+    File names carry a hash of the source name, so a new thumbnail gets new URLs.
+    Output:
+        media/thumbnail/derivatives/<video_id>/<width>-<hash>.<ext>
+    """
+    video = Video.objects.filter(pk=video_id).first()
+    if not video or not video.thumbnail:
+        return
+
+    source_path = Path(video.thumbnail.path)
+    if not source_path.exists():
+        return
+
+    output_dir = thumbnail_derivatives_dir(video.id)
+    shutil.rmtree(output_dir, ignore_errors=True)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    version = hashlib.sha1(video.thumbnail.name.encode()).hexdigest()[:8]
+    media_root = Path(settings.MEDIA_ROOT)
+
+    with Image.open(source_path) as source:
+        image = ImageOps.exif_transpose(source).convert("RGB")
+
+    widths = [width for width in THUMBNAIL_WIDTHS if width < image.width] or [image.width]
+    derivatives = {ext: {} for ext in THUMBNAIL_FORMATS}
+    for width in widths:
+        height = max(round(image.height * width / image.width), 1)
+        resized = image.resize((width, height), Image.Resampling.LANCZOS)
+        for ext, (image_format, options) in THUMBNAIL_FORMATS.items():
+            target = output_dir / f"{width}-{version}.{ext}"
+            resized.save(target, image_format, **options)
+            derivatives[ext][str(width)] = target.relative_to(media_root).as_posix()
+
+    Video.objects.filter(pk=video.pk).update(thumbnail_derivatives=derivatives)
+    invalidate_video(video.pk)
+    bump_catalog_version()
+    enqueue_catalog_warmup()
+
+
+def enqueue_thumbnail_derivatives(video_id: int) -> None:
+    """Enqueue generate_thumbnail_derivatives for a video."""
+    django_rq.get_queue("default").enqueue(generate_thumbnail_derivatives, video_id)
+
+
+def enqueue_poster_extraction(video_id: int) -> None:
+    """Enqueue generate_preview_images without sprites (a new poster for a cleared thumbnail)."""
+    django_rq.get_queue("default").enqueue(generate_preview_images, video_id, False)
+
+
+def convert_video_to_hls(video_id: int) -> None:
+    """
+    Convert uploaded video into HLS format for 480p, 720p and 1080p,
+    skipping every rendition above the probed source height.
+    Output:
+        media/hls/<video_id>/staging/<version>/<resolution>/index.m3u8,
+        published as media/hls/<video_id>/current/ once every rendition is written
+
+    The source is hashed first; if an identical upload has already been
+    transcoded its output is hard-linked instead of encoding again.
+
+    HLS_TRANSCODE_MODE selects how the renditions are produced:
+    - "single_pass": decode once and split into all renditions
+    - "sequential": one ffmpeg process per rendition in this job
+    - "fan_out": one RQ job per rendition plus a dependent finalize job
+    """
+
+    video, input_path = _get_source(video_id)
+    if not video:
+        return
+
+    content_hash = hash_file(input_path)
+    Video.objects.filter(pk=video.pk).update(content_hash=content_hash)
+    if _reuse_duplicate_output(video, content_hash):
+        has_trickplay = (trickplay_dir(video.id) / TRICKPLAY_VTT_NAME).exists()
+        _enqueue_preview_images(video.id, video.video_file.name, sprites=not has_trickplay)
         return
 
-    base_output_dir = Path(settings.MEDIA_ROOT) / "hls" / str(video.id)
+    ladder = _probe_and_plan(video, input_path)
+    _enqueue_preview_images(video.id, video.video_file.name)
 
-    for label, height in RESOLUTIONS.items():
-        output_dir = base_output_dir / label
-        output_dir.mkdir(parents=True, exist_ok=True)
-        playlist_path = output_dir / "index.m3u8"
-        segment_pattern = str(output_dir / "%03d.ts")
+    version = new_version()
+    mode = getattr(settings, "HLS_TRANSCODE_MODE", "single_pass")
+    if mode == "fan_out":
+        _enqueue_rendition_jobs(video.id, video.video_file.name, ladder, version)
+        return
+
+    base_output_dir = staging_dir(video.id, version)
+    for label in ladder:
+        (base_output_dir / label).mkdir(parents=True, exist_ok=True)
 
-        cmd = [
-            "ffmpeg","-y","-i", str(input_path),
-            "-vf", f"scale=-2:{height}",
-            "-c:v", "libx264","-c:a", "aac","-hls_time", "6","-hls_list_size", "0",
-            "-hls_segment_filename", segment_pattern,str(playlist_path),
+    levels = rendition_levels(video, ladder)
+    if mode == "single_pass":
+        commands = [build_single_pass_command(input_path, base_output_dir, ladder, version, levels)]
+    else:
+        commands = [
+            build_rendition_command(input_path, base_output_dir / label, label, height, version, levels[label])
+            for label, height in ladder.items()
         ]
 
-        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
\ No newline at end of file
+    for cmd in commands:
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    finalize_hls_conversion(video.id, list(ladder), version)
+
+
+def enqueue_hls_garbage_collection(video_id: int) -> None:
+    """
+    Schedule collect_hls_versions once HLS_VERSION_RETENTION has passed,
+    so clients still playing a replaced version are not cut off.
+    """
+    retention = getattr(settings, "HLS_VERSION_RETENTION", 60 * 60 * 12)
+    queue = django_rq.get_queue("default")
+    queue.enqueue_in(timedelta(seconds=retention + 60), collect_hls_versions, video_id)
+
+
+def collect_hls_versions(video_id: int) -> None:
+    """Delete retired HLS/trickplay versions and abandoned staging output of a video."""
+    collect_garbage(video_id, getattr(settings, "HLS_VERSION_RETENTION", 60 * 60 * 12))
+
+
+def _enqueue_preview_images(video_id: int, file_name: str, sprites: bool = True) -> None:
+    """Enqueue poster extraction and trickplay generation as a job of its own."""
+    queue = django_rq.get_queue("default")
+    queue.enqueue(
+        generate_preview_images, video_id, sprites,
+        job_id=hls_job_id(video_id, file_name, "previews"),
+    )
+
+
+def _enqueue_rendition_jobs(video_id: int, file_name: str, ladder: dict[str, int], version: str) -> None:
+    """
+    Enqueue one job per rendition and a finalize job depending on all of them.
+    The finalize job also runs when a rendition failed, so the finished ones are published.
+    """
+    queue = django_rq.get_queue("default")
+    rendition_jobs = [
+        queue.enqueue(
+            convert_rendition_to_hls, video_id, label, height, version,
+            job_id=hls_job_id(video_id, file_name, label),
+        )
+        for label, height in ladder.items()
+    ]
+    queue.enqueue(
+        finalize_hls_conversion, video_id, list(ladder), version,
+        job_id=hls_job_id(video_id, file_name, "finalize"),
+        depends_on=Dependency(jobs=rendition_jobs, allow_failure=True),
+    )
+
+
+def convert_rendition_to_hls(video_id: int, label: str, height: int, version: str) -> None:
+    """
+    Encode a single rendition of a video into the staging tree of `version`.
+    Raises CalledProcessError on ffmpeg failure; the finalize job then publishes
+    the other renditions and reports this one as missing.
+    """
+    video, input_path = _get_source(video_id)
+    if not video:
+        return
+
+    output_dir = staging_dir(video.id, version) / label
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    level = rendition_levels(video, {label: height})[label]
+    cmd = build_rendition_command(input_path, output_dir, label, height, version, level)
+    subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+
+
+def finalize_hls_conversion(video_id: int, labels: list[str], version: str) -> None:
+    """
+    Run once every rendition of a video has been written.
+    Writes the master playlist into the staging tree, publishes it atomically,
+    records the renditions that were produced on the video and raises
+    RuntimeError if a rendition is missing or incomplete.
+    Without any finished rendition the previously published version stays live.
+    """
+    if not Video.objects.filter(pk=video_id).exists():
+        return
+
+    base_output_dir = staging_dir(video_id, version)
+    produced = [
+        label for label in labels
+        if _is_complete_playlist(base_output_dir / label / "index.m3u8")
+    ]
+    if produced:
+        write_master_playlist(base_output_dir, produced)
+        publish_hls_version(video_id, version)
+        Video.objects.filter(pk=video_id).update(hls_renditions=produced)
+        invalidate_video(video_id)
+        enqueue_hls_garbage_collection(video_id)
+
+    missing = [label for label in labels if label not in produced]
+    if missing:
+        raise RuntimeError(f"HLS conversion of video {video_id} incomplete: {', '.join(missing)}")
+
+
+def _is_complete_playlist(playlist_path: Path) -> bool:
+    """Return True if a VOD playlist exists and has been fully written."""
+    if not playlist_path.exists():
+        return False
+    return "#EXT-X-ENDLIST" in playlist_path.read_text(errors="ignore")
+
+
+def write_master_playlist(base_output_dir: Path, labels: list[str]) -> Path:
+    """
+    Write <base_output_dir>/master.m3u8 referencing every rendition playlist,
+    ordered from the lowest to the highest bandwidth so players start small.
+    """
+    variants = [_describe_rendition(base_output_dir / label, label) for label in labels]
+    variants.sort(key=lambda variant: variant["bandwidth"])
+
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-INDEPENDENT-SEGMENTS"]
+    for variant in variants:
+        attributes = [
+            f"BANDWIDTH={variant['bandwidth']}",
+            f"AVERAGE-BANDWIDTH={variant['average_bandwidth']}",
+        ]
+        if variant["resolution"]:
+            attributes.append(f"RESOLUTION={variant['resolution']}")
+        attributes.append(f'CODECS="{variant["codecs"]}"')
+        lines.append(f"#EXT-X-STREAM-INF:{','.join(attributes)}")
+        lines.append(f"{variant['label']}/index.m3u8")
+
+    master_path = base_output_dir / "master.m3u8"
+    master_path.write_text("\n".join(lines) + "\n")
+    return master_path
+
+
+def _describe_rendition(output_dir: Path, label: str) -> dict:
+    """
+    Measure a finished rendition for the master playlist.
+    BANDWIDTH is the peak segment bitrate, AVERAGE-BANDWIDTH the bitrate over the whole
+    playlist; both fall back to the configured encoder bitrates if nothing can be measured.
+    """
+    segments = _read_playlist_segments(output_dir / "index.m3u8")
+    peak = average = 0
+    total_bits = total_seconds = 0.0
+    for name, seconds in segments:
+        bits = (output_dir / name).stat().st_size * 8
+        total_bits += bits
+        total_seconds += seconds
+        if seconds > 0:
+            peak = max(peak, int(bits / seconds))
+    if total_seconds > 0:
+        average = int(total_bits / total_seconds)
+
+    configured = VIDEO_BITRATES[label] + AUDIO_BITRATE
+    width, height, level, has_audio = (
+        _probe_segment(output_dir / segments[0][0]) if segments else (None, None, None, True)
+    )
+
+    # Advertise the level written into the stream; estimate it if ffprobe cannot read it.
+    if not level:
+        height_guess = height or RESOLUTIONS[label]
+        width_guess = width or round(height_guess * DEFAULT_ASPECT_RATIO)
+        level = int(h264_level(width_guess, height_guess, DEFAULT_FRAME_RATE).replace(".", ""))
+    codecs = f"avc1.6400{level:02x}"
+    if has_audio:
+        codecs += ",mp4a.40.2"
+
+    return {
+        "label": label,
+        "bandwidth": peak or configured,
+        "average_bandwidth": average or configured,
+        "resolution": f"{width}x{height}" if width and height else "",
+        "codecs": codecs,
+    }
+
+
+def _read_playlist_segments(playlist_path: Path) -> list[tuple[str, float]]:
+    """Return (segment name, duration in seconds) pairs of a media playlist."""
+    segments = []
+    duration = 0.0
+    for line in playlist_path.read_text(errors="ignore").splitlines():
+        line = line.strip()
+        if line.startswith("#EXTINF:"):
+            duration = _to_number(line[len("#EXTINF:"):].split(",")[0], float) or 0.0
+        elif line and not line.startswith("#"):
+            segments.append((line, duration))
+    return segments
+
+
+def _probe_segment(segment_path: Path) -> tuple[int | None, int | None, int | None, bool]:
+    """Return the encoded width, height, H.264 level (e.g. 42) and whether an audio stream is present."""
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-show_entries", "stream=codec_type,width,height,level",
+        "-of", "json", str(segment_path),
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    try:
+        streams = json.loads(result.stdout or "{}").get("streams") or []
+    except ValueError:
+        streams = []
+
+    video = next((stream for stream in streams if stream.get("codec_type") == "video"), {})
+    has_audio = any(stream.get("codec_type") == "audio" for stream in streams) if streams else True
+    level = _to_number(video.get("level"), int)
+    return (
+        _to_number(video.get("width"), int),
+        _to_number(video.get("height"), int),
+        level if level and level > 0 else None,
+        has_audio,
+    )
+
+
+TRICKPLAY_INTERVAL_SECONDS = 10
+TRICKPLAY_TILE_WIDTH = 160
+TRICKPLAY_COLUMNS = 10
+TRICKPLAY_ROWS = 10
+TRICKPLAY_VTT_NAME = "thumbnails.vtt"
+
+POSTER_POSITION = 0.1
+
+
+def generate_preview_images(video_id: int, sprites: bool = True) -> None:
+    """
+    Extract a poster frame if the video has no thumbnail and (optionally)
+    build trickplay sprite sheets with a WebVTT thumbnail track.
+    Output:
+        media/thumbnail/poster-<video_id>.jpg
+        media/hls/<video_id>/trickplay/sprite-001.jpg, ..., thumbnails.vtt
+        (trickplay is a symlink to the published trickplay-versions/<version>/)
+    """
+    video, input_path = _get_source(video_id)
+    if not video:
+        return
+
+    if not video.thumbnail:
+        extract_poster(video, input_path)
+    if sprites and video.duration:
+        build_trickplay(video, input_path)
+
+
+def extract_poster(video: Video, input_path: Path) -> None:
+    """Store a frame at POSTER_POSITION of the duration as the video's thumbnail."""
+    name = f"thumbnail/poster-{video.id}.jpg"
+    poster_path = Path(settings.MEDIA_ROOT) / name
+    poster_path.parent.mkdir(parents=True, exist_ok=True)
+
+    cmd = [
+        "ffmpeg", "-y", "-ss", f"{(video.duration or 0) * POSTER_POSITION:.3f}", "-i", str(input_path),
+        "-frames:v", "1", "-q:v", "2", str(poster_path),
+    ]
+    subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+
+    Video.objects.filter(pk=video.pk, thumbnail="").update(thumbnail=name)
+    generate_thumbnail_derivatives(video.id)
+
+
+def _trickplay_tile_height(video: Video) -> int:
+    """Return the (even) tile height matching the source aspect ratio."""
+    if not video.source_width or not video.source_height:
+        return 90
+    height = round(TRICKPLAY_TILE_WIDTH * video.source_height / video.source_width)
+    return max(height - height % 2, 2)
+
+
+def build_trickplay(video: Video, input_path: Path) -> None:
+    """
+    Render one tile every TRICKPLAY_INTERVAL_SECONDS into sprite sheets of
+    TRICKPLAY_COLUMNS x TRICKPLAY_ROWS tiles and describe them in a WebVTT track.
+    The previews are staged and published like the HLS renditions.
+    Only keyframes are decoded (-skip_frame nokey), so this pass costs a fraction of
+    a full decode while the transcode runs; the fps filter picks the keyframe
+    nearest to each interval, keeping one tile per interval for the WebVTT track.
+    """
+    version = new_version()
+    output_dir = staging_dir(video.id, version)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    tile_height = _trickplay_tile_height(video)
+    filters = (
+        f"fps=1/{TRICKPLAY_INTERVAL_SECONDS},"
+        f"scale={TRICKPLAY_TILE_WIDTH}:{tile_height},"
+        f"tile={TRICKPLAY_COLUMNS}x{TRICKPLAY_ROWS}"
+    )
+    cmd = [
+        "ffmpeg", "-y", "-skip_frame", "nokey", "-i", str(input_path), "-an", "-vf", filters,
+        "-q:v", "4", str(output_dir / "sprite-%03d.jpg"),
+    ]
+    subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+
+    vtt = build_trickplay_vtt(video.duration, TRICKPLAY_TILE_WIDTH, tile_height)
+    (output_dir / TRICKPLAY_VTT_NAME).write_text(vtt)
+    publish_trickplay_version(video.id, version)
+    enqueue_hls_garbage_collection(video.id)
+
+
+def build_trickplay_vtt(duration: float, tile_width: int, tile_height: int) -> str:
+    """Return a WebVTT track mapping every interval to its tile (sprite-NNN.jpg#xywh=...)."""
+    tiles_per_sheet = TRICKPLAY_COLUMNS * TRICKPLAY_ROWS
+    count = max(int(-(-duration // TRICKPLAY_INTERVAL_SECONDS)), 1)
+
+    lines = ["WEBVTT", ""]
+    for index in range(count):
+        start = index * TRICKPLAY_INTERVAL_SECONDS
+        end = min(start + TRICKPLAY_INTERVAL_SECONDS, duration)
+        sheet, position = divmod(index, tiles_per_sheet)
+        row, column = divmod(position, TRICKPLAY_COLUMNS)
+        lines.append(f"{_vtt_timestamp(start)} --> {_vtt_timestamp(end)}")
+        lines.append(
+            f"sprite-{sheet + 1:03d}.jpg#xywh="
+            f"{column * tile_width},{row * tile_height},{tile_width},{tile_height}"
+        )
+        lines.append("")
+    return "\n".join(lines)
+
+
+def _vtt_timestamp(seconds: float) -> str:
+    """Format seconds as a WebVTT timestamp (HH:MM:SS.mmm)."""
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{milliseconds:03d}"
+
+
+MEDIA_CLEANUP_BATCH_SIZE = 2000
+
+
+def media_trash_dir() -> Path:
+    """Return the directory deleted media is moved to until the cleanup job removes it."""
+    return Path(settings.MEDIA_ROOT) / "trash"
+
+
+def move_to_trash(paths: list[Path]) -> int:
+    """
+    Rename files/directories into media/trash/ (instant, same filesystem) and
+    enqueue the cleanup job that unlinks them. Returns the number of paths moved.
+    """
+    trash = media_trash_dir()
+    trash.mkdir(parents=True, exist_ok=True)
+    moved = 0
+    for path in paths:
+        if not os.path.lexists(path):
+            continue
+        target = trash / f"{secrets.token_hex(6)}-{path.parent.name}-{path.name}"
+        try:
+            os.rename(path, target)
+        except FileNotFoundError:
+            continue
+        moved += 1
+
+    if moved:
+        enqueue_media_cleanup()
+    return moved
+
+
+def enqueue_media_cleanup() -> None:
+    """Enqueue cleanup_deleted_media."""
+    django_rq.get_queue("default").enqueue(cleanup_deleted_media)
+
+
+def cleanup_deleted_media(batch_size: int | None = None) -> int:
+    """
+    Move HLS/derivative directories without a Video row into the trash, then
+    delete up to MEDIA_CLEANUP_BATCH_SIZE trashed files. If more remain, the job
+    enqueues itself again, so a single long title never blocks a worker for long.
+    Returns the number of files deleted.
+    """
+    reconcile_orphaned_media()
+    deleted, finished = purge_media_trash(batch_size or MEDIA_CLEANUP_BATCH_SIZE)
+    if not finished:
+        enqueue_media_cleanup()
+    return deleted
+
+
+def reconcile_orphaned_media() -> list[Path]:
+    """Trash media/hls/<id>/ and thumbnail derivative directories whose video no longer exists."""
+    media_root = Path(settings.MEDIA_ROOT)
+    candidates = [
+        path
+        for root in (media_root / "hls", media_root / "thumbnail" / "derivatives") if root.is_dir()
+        for path in root.iterdir() if path.is_dir() and path.name.isdigit()
+    ]
+    if not candidates:
+        return []
+
+    ids = {int(path.name) for path in candidates}
+    existing = set(Video.objects.filter(pk__in=ids).values_list("pk", flat=True))
+    orphans = [path for path in candidates if int(path.name) not in existing]
+    move_to_trash(orphans)
+    return orphans
+
+
+def purge_media_trash(batch_size: int) -> tuple[int, bool]:
+    """
+    Delete up to `batch_size` files from media/trash/, removing emptied directories.
+    Returns (files deleted, whether the trash is empty). Concurrent runs are harmless:
+    entries removed by another job are skipped.
+    """
+    trash = media_trash_dir()
+    if not trash.is_dir():
+        return 0, True
+
+    deleted = 0
+    for root, dirs, files in os.walk(trash, topdown=False):
+        for name in files + [name for name in dirs if os.path.islink(os.path.join(root, name))]:
+            if deleted >= batch_size:
+                return deleted, False
+            try:
+                os.unlink(os.path.join(root, name))
+            except FileNotFoundError:
+                continue
+            deleted += 1
+        for name in dirs:
+            path = os.path.join(root, name)
+            if not os.path.islink(path):
+                try:
+                    os.rmdir(path)
+                except OSError:
+                    pass
+    return deleted, not any(trash.iterdir())
+
+
+UPLOAD_EXPIRY_JOB_PREFIX = "upload-expiry"
+
+
+def enqueue_upload_expiry() -> str:
+    """
+    Schedule expire_uploads for when an upload started now may have been idle for
+    VIDEO_UPLOAD_SESSION_MAX_AGE. Runs are rounded up to the full hour and the job id
+    is derived from the run time, so all uploads started within an hour share one job.
+    """
+    run_at = datetime.now(timezone.utc) + timedelta(seconds=upload_session_max_age() + 60)
+    run_at = run_at.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    job_id = f"{UPLOAD_EXPIRY_JOB_PREFIX}-{run_at:%Y%m%d%H}"
+
+    queue = django_rq.get_queue("default")
+    if queue.fetch_job(job_id) is None:
+        queue.enqueue_at(run_at, expire_uploads, job_id=job_id)
+    return job_id
+
+
+def expire_uploads() -> int:
+    """Discard idle upload sessions and schedule the next run while uploads are still open."""
+    expired = expire_upload_sessions()
+    if UploadSession.objects.filter(video__isnull=True).exists():
+        enqueue_upload_expiry()
+    return expired
@@ -1,3 +1,273 @@
-from django.test import TestCase
+import fcntl
+import tempfile
+import time
+from base64 import b64encode
+from pathlib import Path
+from unittest import mock
+from urllib.parse import parse_qs
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+
+from videos.api.serializers import VIDEO_LIST_FIELDS, VideoSerializer, serialize_video_rows
+from videos.api.signing import build_segment_query, segment_url_ttl, verify_segment_signature
+from videos.models import UploadSession, Video
+from videos.uploads import upload_part_path
+
+
+class VideoListFastPathTests(TestCase):
+    """The `.values()` fast path must produce exactly the VideoSerializer output."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Video.objects.bulk_create([
+            Video(
+                title=f"Title {index}",
+                description="Some description" if index else "",
+                category="Drama" if index % 2 else "Comedy",
+                thumbnail=f"thumbnail/poster {index}.png",
+                thumbnail_derivatives={
+                    "webp": {
+                        "640": f"thumbnail/derivatives/{index}/640-abc.webp",
+                        "320": f"thumbnail/derivatives/{index}/320-abc.webp",
+                    },
+                    "jpeg": {"320": f"thumbnail/derivatives/{index}/320-abc.jpeg"},
+                } if index else {},
+                video_file=f"videos/movie-{index}.mp4",
+            )
+            for index in range(3)
+        ])
+
+    def test_matches_video_serializer_with_request(self):
+        request = RequestFactory().get("/api/video/")
+        videos = Video.objects.order_by("-created_at", "-id")
+
+        expected = VideoSerializer(videos, many=True, context={"request": request}).data
+        actual = serialize_video_rows(videos.values(*VIDEO_LIST_FIELDS), request)
+
+        self.assertEqual(actual, [dict(item) for item in expected])
+
+    def test_matches_video_serializer_without_request(self):
+        videos = Video.objects.order_by("-created_at", "-id")
+
+        expected = VideoSerializer(videos, many=True).data
+        actual = serialize_video_rows(videos.values(*VIDEO_LIST_FIELDS))
+
+        self.assertEqual(actual, [dict(item) for item in expected])
+
+
+class SegmentSignatureTests(TestCase):
+    """Segment URLs are authorized by their HMAC signature alone."""
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name))
+
+        segment_dir = Path(media_root.name) / "hls" / "7" / "720p"
+        segment_dir.mkdir(parents=True)
+        (segment_dir / "000.ts").write_bytes(b"\x47" * 188)
+
+    def _params(self, movie_id=7, resolution="720p"):
+        query, _ = build_segment_query(3, movie_id, resolution)
+        return {key: values[0] for key, values in parse_qs(query).items()}
+
+    def _get(self, params, movie_id=7, resolution="720p"):
+        return self.client.get(f"/api/video/{movie_id}/{resolution}/000.ts/", params)
+
+    def test_valid_signature(self):
+        params = self._params()
+
+        self.assertEqual(verify_segment_signature(params, 7, "720p"), int(params["e"]))
+        response = self._get(params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Cache-Control"].startswith("public, max-age="))
+
+    def test_tampered_signature(self):
+        params = self._params()
+        params["s"] = ("0" if params["s"][0] != "0" else "1") + params["s"][1:]
+
+        self.assertIsNone(verify_segment_signature(params, 7, "720p"))
+        self.assertEqual(self._get(params).status_code, 403)
+
+    def test_tampered_user(self):
+        params = {**self._params(), "u": "4"}
+
+        self.assertEqual(self._get(params).status_code, 403)
+
+    def test_expired_url(self):
+        params = self._params()
+
+        with mock.patch("videos.api.signing.time.time", return_value=int(params["e"]) + 1):
+            self.assertIsNone(verify_segment_signature(params, 7, "720p"))
+        self.assertEqual(self._get({**params, "e": str(int(time.time()) - 1)}).status_code, 403)
+
+    def test_wrong_movie_or_resolution(self):
+        params = self._params()
+
+        self.assertEqual(self._get(params, movie_id=8).status_code, 403)
+        self.assertEqual(self._get(params, resolution="480p").status_code, 403)
+
+
+class SignedPlaylistRevalidationTests(TestCase):
+    """A signed playlist must not be revalidated past its signing window."""
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name))
+
+        video = Video.objects.bulk_create([
+            Video(title="Title", category="Drama", video_file="videos/movie.mp4", hls_renditions=["720p"])
+        ])[0]
+        playlist_dir = Path(media_root.name) / "hls" / str(video.pk) / "720p"
+        playlist_dir.mkdir(parents=True)
+        (playlist_dir / "index.m3u8").write_text("#EXTM3U\n#EXTINF:4.0,\n000.ts\n#EXT-X-ENDLIST\n")
+
+        user = User.objects.create_user(username="viewer@example.com", email="viewer@example.com", password="x")
+        self.client.cookies["access_token"] = str(AccessToken.for_user(user))
+        self.url = f"/api/video/{video.pk}/720p/index.m3u8"
+
+    def test_if_modified_since_does_not_keep_expired_signatures(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertNotIn("Last-Modified", first)
+
+        later = time.time() + segment_url_ttl()
+        with mock.patch("videos.api.signing.time.time", return_value=later):
+            response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.content, first.content)
+
+    def test_unchanged_playlist_is_revalidated_by_etag(self):
+        first = self.client.get(self.url)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+
+class ClearedThumbnailTests(TestCase):
+    """Removing a thumbnail must drop its srcset and request a new poster frame."""
+
+    def test_clearing_thumbnail_resets_derivatives(self):
+        video = Video.objects.bulk_create([
+            Video(
+                title="Title",
+                category="Drama",
+                thumbnail="thumbnail/poster.png",
+                thumbnail_derivatives={"webp": {"320": "thumbnail/derivatives/1/320-abc.webp"}},
+                video_file="videos/movie.mp4",
+                hls_renditions=["720p"],
+            )
+        ])[0]
+        video = Video.objects.get(pk=video.pk)
+
+        video.thumbnail = ""
+        with mock.patch("videos.signals.move_to_trash") as move_to_trash, \
+                mock.patch("videos.signals.enqueue_poster_extraction") as enqueue_poster, \
+                mock.patch("videos.signals.enqueue_catalog_warmup"), \
+                self.captureOnCommitCallbacks(execute=True):
+            video.save()
+
+        video.refresh_from_db()
+        self.assertEqual(video.thumbnail_derivatives, {})
+        self.assertIsNone(VideoSerializer(video).data["thumbnail_srcset"])
+        move_to_trash.assert_called_once()
+        enqueue_poster.assert_called_once_with(video.pk)
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class VideoCursorPaginationTests(TestCase):
+    """Pages follow (created_at, id), also across videos sharing a timestamp."""
+
+    def setUp(self):
+        cache.clear()
+        Video.objects.bulk_create([
+            Video(title=f"Title {index}", category="Drama", video_file=f"videos/movie-{index}.mp4")
+            for index in range(7)
+        ])
+        Video.objects.update(created_at=timezone.now())
+        self.expected = list(Video.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+
+        user = User.objects.create_user(username="viewer@example.com", email="viewer@example.com", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def test_pages_cover_tied_timestamps_once(self):
+        ids, pages = [], []
+        url = "/api/video/?page_size=3"
+        while url:
+            payload = self.client.get(url).json()
+            pages.append(payload)
+            ids += [video["id"] for video in payload["results"]]
+            url = payload["next"]
+
+        self.assertEqual(ids, self.expected)
+
+        previous = self.client.get(pages[-1]["previous"]).json()
+        self.assertEqual([video["id"] for video in previous["results"]], self.expected[3:6])
+
+    def test_invalid_position_is_rejected(self):
+        cursor = b64encode(b"p=not-a-position").decode()
+        self.assertEqual(self.client.get(f"/api/video/?cursor={cursor}").status_code, 404)
+
+
+class ResumableUploadTests(TestCase):
+    """Chunks are appended without a row lock, and a failed completion keeps the upload intact."""
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name))
+
+        admin = User.objects.create_user(
+            username="admin@example.com", email="admin@example.com", password="x", is_staff=True
+        )
+        self.session = UploadSession.objects.create(
+            created_by=admin, title="Title", category="Drama", filename="movie.mp4", size=8
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+
+    def _patch(self, data, offset):
+        return self.client.generic(
+            "PATCH", f"/api/video/uploads/{self.session.pk}/", data,
+            content_type="application/offset+octet-stream", HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def test_chunk_is_appended_without_row_lock(self):
+        with mock.patch("django.db.models.query.QuerySet.select_for_update") as select_for_update:
+            response = self._patch(b"abcd", 0)
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response["Upload-Offset"], "4")
+        select_for_update.assert_not_called()
+        self.assertEqual(upload_part_path(self.session).read_bytes(), b"abcd")
+
+    def test_concurrent_writer_gets_conflict(self):
+        part_path = upload_part_path(self.session)
+        part_path.parent.mkdir(parents=True)
+        with open(part_path, "ab") as part:
+            fcntl.flock(part.fileno(), fcntl.LOCK_EX)
+            response = self._patch(b"abcd", 0)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response["Upload-Offset"], "0")
+
+    def test_failed_create_keeps_part_file(self):
+        self._patch(b"abcdefgh", 0)
+
+        with mock.patch("videos.uploads.Video.objects.create", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.client.post(f"/api/video/uploads/{self.session.pk}/complete/")
+
+        self.session.refresh_from_db()
+        self.assertIsNone(self.session.video_id)
+        self.assertEqual(upload_part_path(self.session).read_bytes(), b"abcdefgh")
+        self.assertFalse(Video.objects.exists())
@@ -0,0 +1,165 @@
+from __future__ import annotations
+import fcntl
+import os
+from datetime import timedelta
+from pathlib import Path
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import UploadSession, Video
+
+
+UPLOAD_READ_SIZE = 1024 * 1024
+
+
+def upload_part_path(session: UploadSession) -> Path:
+    """Return the file the chunks of an upload session are appended to."""
+    return Path(settings.MEDIA_ROOT) / "uploads" / f"{session.id}.part"
+
+
+def upload_session_max_age() -> int:
+    """Return how long an unfinished upload may stay idle before it is discarded."""
+    return int(getattr(settings, "VIDEO_UPLOAD_SESSION_MAX_AGE", 60 * 60 * 24))
+
+
+def max_chunk_size() -> int:
+    """Return the largest chunk accepted per request (keeps each request short)."""
+    return int(getattr(settings, "VIDEO_UPLOAD_MAX_CHUNK_SIZE", 64 * 1024 * 1024))
+
+
+def _try_lock(file) -> bool:
+    """Take an exclusive, non-blocking flock on an open file; False if another process holds it."""
+    try:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def _part_in_use(session: UploadSession) -> bool:
+    """Return whether a request is appending to the session's part file right now."""
+    part_path = upload_part_path(session)
+    if not part_path.exists():
+        return False
+    with open(part_path, "rb") as part:
+        return not _try_lock(part)
+
+
+def _store_offset(session: UploadSession, expected: int, offset: int) -> bool:
+    """Move the stored offset from `expected` to `offset` (compare-and-swap); False if it had changed."""
+    updated = UploadSession.objects.filter(pk=session.pk, offset=expected, video__isnull=True).update(
+        offset=offset, updated_at=timezone.now()
+    )
+    if updated:
+        session.offset = offset
+    return bool(updated)
+
+
+def append_chunk(session: UploadSession, stream, length: int) -> int | None:
+    """
+    Write up to `length` bytes from `stream` at the session's offset and return the new offset,
+    or None if another request is writing to the session or has moved its offset.
+    The body is copied in UPLOAD_READ_SIZE pieces, so it is never held in memory or spooled
+    to a temp file. Bytes received before a dropped connection are kept and counted.
+    No row lock or transaction is held while reading from the client: writers are serialized
+    by an flock on the part file, and the offset is stored with a compare-and-swap.
+    """
+    part_path = upload_part_path(session)
+    part_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(part_path, "ab") as target:
+        if not _try_lock(target):
+            return None
+        start = session.offset
+        if not UploadSession.objects.filter(pk=session.pk, offset=start, video__isnull=True).exists():
+            return None
+
+        # Discard bytes of an earlier request that was never acknowledged.
+        target.truncate(start)
+        remaining = length
+        try:
+            while remaining > 0:
+                chunk = stream.read(min(UPLOAD_READ_SIZE, remaining))
+                if not chunk:
+                    break
+                target.write(chunk)
+                remaining -= len(chunk)
+        finally:
+            target.flush()
+            os.fsync(target.fileno())
+            stored = _store_offset(session, start, target.tell())
+    return session.offset if stored else None
+
+
+def assemble_upload(session: UploadSession) -> Video:
+    """
+    Create the Video of a completed upload and move the part file into videos/.
+    Call inside transaction.atomic() with the session row locked. The rows are written
+    first and the file is renamed (not copied) last, so a failed create leaves the part
+    file in place; if the transaction still rolls back, restore_upload() moves it back.
+    Transcoding starts from the post_save signal once the transaction commits.
+    The stored name is built like a FileField upload (upload_to, get_valid_name, no collisions).
+    """
+    field = Video._meta.get_field("video_file")
+    name = field.generate_filename(None, Path(session.filename).name)
+    name = field.storage.get_available_name(name, max_length=field.max_length)
+
+    video = Video.objects.create(
+        title=session.title,
+        description=session.description,
+        category=session.category,
+        video_file=name,
+    )
+    session.video = video
+    session.save(update_fields=["video", "updated_at"])
+
+    target_path = Path(settings.MEDIA_ROOT) / name
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(upload_part_path(session), target_path)
+    return video
+
+
+def restore_upload(session: UploadSession) -> None:
+    """Undo the file move of assemble_upload() after its transaction was rolled back."""
+    if session.video is None:
+        return
+    target_path = Path(settings.MEDIA_ROOT) / session.video.video_file.name
+    part_path = upload_part_path(session)
+    if target_path.exists() and not part_path.exists():
+        os.replace(target_path, part_path)
+    session.video = None
+
+
+def discard_upload(session: UploadSession) -> None:
+    """Delete an unfinished upload session and its part file."""
+    upload_part_path(session).unlink(missing_ok=True)
+    session.delete()
+
+
+def expire_upload_sessions() -> int:
+    """
+    Discard unfinished upload sessions idle for longer than VIDEO_UPLOAD_SESSION_MAX_AGE,
+    and part files left without a session. Returns the number of sessions discarded.
+    """
+    cutoff = timezone.now() - timedelta(seconds=upload_session_max_age())
+    stale = UploadSession.objects.filter(video__isnull=True, updated_at__lt=cutoff)
+    expired = 0
+    for session_id in list(stale.values_list("id", flat=True)):
+        # Sessions a request is completing or writing to right now are skipped.
+        with transaction.atomic():
+            session = stale.select_for_update(skip_locked=True).filter(pk=session_id).first()
+            if session and not _part_in_use(session):
+                discard_upload(session)
+                expired += 1
+
+    uploads_dir = Path(settings.MEDIA_ROOT) / "uploads"
+    parts = {path.stem: path for path in uploads_dir.glob("*.part")} if uploads_dir.is_dir() else {}
+    if parts:
+        open_ids = {
+            str(session_id)
+            for session_id in UploadSession.objects.filter(video__isnull=True).values_list("id", flat=True)
+        }
+        for stem, path in parts.items():
+            if stem not in open_ids and path.stat().st_mtime < cutoff.timestamp():
+                path.unlink(missing_ok=True)
+    return expired